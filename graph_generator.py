@@ -5,6 +5,7 @@ Standalone script for generating glucose graphs from stored data
 
 import argparse
 import sys
+import matplotlib
 from datetime import datetime, timedelta
 from src.config import Settings
 from src.database import GlucoseDatabase
@@ -26,6 +27,10 @@ def main():
     
     args = parser.parse_args()
     
+    if args.output:
+        # Saving only: use the non-interactive backend instead of loading a GUI toolkit
+        matplotlib.use('Agg')
+    
     try:
         # Initialize components
         settings = Settings(args.env_file)
@@ -1,13 +1,48 @@
 import logging
 import numpy as np
 from typing import List, Tuple, Optional
-from datetime import datetime, timedelta
+from datetime import timedelta
 from scipy import stats
 from ..database import GlucoseReading
 from ..config import Settings
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 logger = logging.getLogger(__name__)
 
+def _slope_variance(x: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+    """Least-squares slope of y over x and the population variance of y"""
+    n = len(y)
+    mean_x = 0.0
+    mean_y = 0.0
+    for i in range(n):
+        mean_x += x[i]
+        mean_y += y[i]
+    mean_x /= n
+    mean_y /= n
+    
+    sxx = 0.0
+    sxy = 0.0
+    syy = 0.0
+    for i in range(n):
+        dx = x[i] - mean_x
+        dy = y[i] - mean_y
+        sxx += dx * dx
+        sxy += dx * dy
+        syy += dy * dy
+    
+    # Identical timestamps give no slope
+    slope = sxy / sxx if sxx > 0.0 else 0.0
+    return slope, syy / n
+
+if HAS_NUMBA:
+    # Compiled once and cached on disk; NUMBA_DISABLE_JIT=1 runs the Python version
+    _slope_variance = njit(cache=True)(_slope_variance)
+
 class TrendAnalyzer:
     def __init__(self, settings: Settings):
         self.settings = settings
@@ -36,18 +71,16 @@ class TrendAnalyzer:
         recent_readings = sorted_readings[:analysis_count]
         
         values = [r.value for r in recent_readings]
-        timestamps = [r.timestamp for r in recent_readings]
         
-        # Calculate rate of change (mg/dL per minute)
-        rate_of_change = self._calculate_rate_of_change(values, timestamps)
+        # Rate of change (mg/dL per minute) and variance in one pass
+        rate_of_change, variance = self._calculate_rate_and_variance(recent_readings)
         
         # Determine trend direction and strength
         trend = self._classify_trend(rate_of_change)
         trend_strength = self._calculate_trend_strength(values)
         direction = self._get_direction(rate_of_change)
         
-        # Calculate variance and stability
-        variance = np.var(values) if len(values) > 1 else 0.0
+        # Determine stability
         is_stable = variance < self.settings.stable_variance_threshold
         
         return {
@@ -62,42 +95,14 @@ class TrendAnalyzer:
             'previous_value': recent_readings[1].value if len(recent_readings) > 1 else None
         }
     
-    def _calculate_rate_of_change(self, values: List[float], 
-                                 timestamps: List[datetime]) -> float:
-        """Calculate rate of change in mg/dL per minute"""
-        if len(values) < 2:
-            return 0.0
-        
-        # Convert timestamps to minutes from the earliest reading
-        time_minutes = []
-        earliest = min(timestamps)
-        for ts in timestamps:
-            time_minutes.append((ts - earliest).total_seconds() / 60.0)
-        
-        # Check if all timestamps are identical
-        if all(t == time_minutes[0] for t in time_minutes):
-            logger.debug("All timestamps are identical, cannot calculate rate of change")
-            return 0.0
-        
-        # Reverse to have chronological order for regression
-        time_minutes.reverse()
-        values_chrono = values[::-1]
-        
-        # Calculate linear regression to get rate of change
-        if len(values_chrono) >= 2:
-            try:
-                slope, intercept, r_value, p_value, std_err = stats.linregress(
-                    time_minutes, values_chrono
-                )
-                return slope
-            except Exception as e:
-                logger.warning(f"Error calculating regression: {e}")
-                # Fallback to simple difference
-                time_diff = (timestamps[0] - timestamps[1]).total_seconds() / 60.0
-                if time_diff > 0:
-                    return (values[0] - values[1]) / time_diff
+    def _calculate_rate_and_variance(self, readings: List[GlucoseReading]) -> Tuple[float, float]:
+        """Calculate rate of change in mg/dL per minute and the variance of the values"""
+        # Minutes relative to the oldest reading keep the regression well conditioned
+        earliest = readings[-1].timestamp
+        time_minutes = np.array([(r.timestamp - earliest).total_seconds() / 60.0 for r in readings])
+        values = np.array([r.value for r in readings], dtype=np.float64)
         
-        return 0.0
+        return _slope_variance(time_minutes, values)
     
     def _classify_trend(self, rate_of_change: float) -> str:
         """Classify trend based on rate of change"""
@@ -5,12 +5,34 @@ from ..command_processor import CommandResult
 
 logger = logging.getLogger(__name__)
 
+_TREND_ARROWS = {
+    'very_fast_up': '↑↑↑',
+    'fast_up': '↑↑',
+    'up': '↑',
+    'no_change': '→',
+    'down': '↓',
+    'fast_down': '↓↓',
+    'very_fast_down': '↓↓↓'
+}
+
+_TREND_TEXT = {
+    'very_fast_up': 'Rising Very Rapidly',
+    'fast_up': 'Rising Rapidly',
+    'up': 'Rising',
+    'no_change': 'Stable',
+    'down': 'Falling',
+    'fast_down': 'Falling Rapidly',
+    'very_fast_down': 'Falling Very Rapidly'
+}
+
 
 class TerminalFormatter:
     """Formats command results for terminal display"""
     
     def __init__(self, settings):
         self.settings = settings
+        # Settings do not change at runtime, so the prediction header is built once
+        self._prediction_header = f"Prediction ({settings.prediction_minutes_ahead} min):"
     
     def format_insulin_result(self, result: CommandResult) -> str:
         """Format insulin command result for terminal"""
@@ -222,8 +244,7 @@ class TerminalFormatter:
         # Show prediction if available
         if 'prediction' in data:
             prediction = data['prediction']
-            pred_time = self.settings.prediction_minutes_ahead
-            output.append(f"Prediction ({pred_time} min):")
+            output.append(self._prediction_header)
             output.append(f"  Value: {prediction['predicted_value']} mg/dL")
             output.append(f"  Confidence: {prediction['confidence'].title()}")
             output.append(f"  Method: {prediction['method'].replace('_', ' ').title()}")
@@ -310,26 +331,8 @@ Examples:
     
     def _get_trend_arrow(self, trend: str) -> str:
         """Get arrow symbol for trend (only place emojis are allowed)"""
-        arrows = {
-            'very_fast_up': '↑↑↑',
-            'fast_up': '↑↑',
-            'up': '↑',
-            'no_change': '→',
-            'down': '↓',
-            'fast_down': '↓↓',
-            'very_fast_down': '↓↓↓'
-        }
-        return arrows.get(trend, '→')
+        return _TREND_ARROWS.get(trend, '→')
     
     def _format_trend_text(self, trend: str) -> str:
         """Format trend text for display"""
-        trend_text = {
-            'very_fast_up': 'Rising Very Rapidly',
-            'fast_up': 'Rising Rapidly',
-            'up': 'Rising',
-            'no_change': 'Stable',
-            'down': 'Falling',
-            'fast_down': 'Falling Rapidly',
-            'very_fast_down': 'Falling Very Rapidly'
-        }
-        return trend_text.get(trend, 'Unknown')
\ No newline at end of file
+        return _TREND_TEXT.get(trend, 'Unknown')
\ No newline at end of file
@@ -104,10 +104,38 @@ class Settings:
     def telegram_status_end_hour(self) -> int:
         return int(os.getenv("TELEGRAM_STATUS_END_HOUR", "22"))
     
+    @property
+    def telegram_alert_dedup_seconds(self) -> int:
+        return int(os.getenv("TELEGRAM_ALERT_DEDUP_SECONDS", "120"))
+    
+    @property
+    def telegram_webhook_url(self) -> Optional[str]:
+        return os.getenv("TELEGRAM_WEBHOOK_URL")
+    
+    @property
+    def telegram_webhook_secret(self) -> Optional[str]:
+        return os.getenv("TELEGRAM_WEBHOOK_SECRET")
+    
+    @property
+    def telegram_webhook_port(self) -> int:
+        return int(os.getenv("TELEGRAM_WEBHOOK_PORT", "8443"))
+    
+    @property
+    def telegram_webhook_host(self) -> str:
+        return os.getenv("TELEGRAM_WEBHOOK_HOST", "127.0.0.1")
+    
+    @property
+    def telegram_workers(self) -> int:
+        return int(os.getenv("TELEGRAM_WORKERS", "2"))
+    
     @property
     def database_path(self) -> str:
         return os.getenv("DATABASE_PATH", "glucose_monitor.db")
     
+    @property
+    def database_wal_mode(self) -> bool:
+        return os.getenv("DATABASE_WAL_MODE", "false").lower() == "true"
+    
     @property
     def enable_terminal_output(self) -> bool:
         return os.getenv("ENABLE_TERMINAL_OUTPUT", "true").lower() == "true"
@@ -1,5 +1,6 @@
 import sqlite3
 import logging
+import uuid
 from datetime import datetime, timedelta
 from typing import List, Optional, Tuple
 from dataclasses import dataclass
@@ -13,6 +14,10 @@ class GlucoseReading:
     trend: Optional[str] = None
     unit: str = "mg/dL"
     id: Optional[int] = None
+    
+    def to_row(self) -> Tuple[str, float, Optional[str], str]:
+        """Column values for INSERT INTO glucose_readings (timestamp, value, trend, unit)"""
+        return (self.timestamp.isoformat(), self.value, self.trend, self.unit)
 
 @dataclass
 class InsulinEntry:
@@ -50,13 +55,36 @@ class GlucoseNote:
     id: Optional[int] = None
 
 class GlucoseDatabase:
-    def __init__(self, db_path: str = "glucose_monitor.db"):
+    def __init__(self, db_path: str = "glucose_monitor.db", wal_mode: bool = False):
         self.db_path = db_path
+        self.wal_mode = wal_mode
+        self._memory_uri = None
+        self._memory_anchor = None
+        if db_path == ":memory:":
+            # Each call opens its own connection, which would see a new empty
+            # :memory: database; share one named in-memory database instead and
+            # hold a connection so it lives as long as this object
+            self._memory_uri = f"file:glucose-{uuid.uuid4().hex}?mode=memory&cache=shared"
+            self._memory_anchor = sqlite3.connect(self._memory_uri, uri=True,
+                                                  check_same_thread=False)
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the database"""
+        if self._memory_uri is not None:
+            return sqlite3.connect(self._memory_uri, uri=True)
+        return sqlite3.connect(self.db_path)
+    
     def init_database(self):
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
+            
+            if self.wal_mode and self._memory_uri is None:
+                # Opt-in write-ahead log: readers no longer wait on the monitor
+                # loop's writes. The mode persists in the file and adds -wal/-shm
+                # files beside it, which read-only mounts cannot create
+                cursor.execute("PRAGMA journal_mode=WAL")
+            
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS glucose_readings (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -156,8 +184,13 @@ class GlucoseDatabase:
             conn.commit()
             logger.info("Database initialized successfully")
     
+    def query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        """Run a read-only SQL query and return all rows"""
+        with self._connect() as conn:
+            return conn.execute(sql, params).fetchall()
+    
     def insert_reading(self, reading: GlucoseReading) -> int:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # Check if reading already exists with same timestamp and value
@@ -174,19 +207,32 @@ class GlucoseDatabase:
             cursor.execute('''
                 INSERT INTO glucose_readings (timestamp, value, trend, unit)
                 VALUES (?, ?, ?, ?)
-            ''', (
-                reading.timestamp.isoformat(),
-                reading.value,
-                reading.trend,
-                reading.unit
-            ))
+            ''', reading.to_row())
             conn.commit()
             reading_id = cursor.lastrowid
             logger.info(f"Inserted glucose reading: {reading.value} {reading.unit} at {reading.timestamp}")
             return reading_id
     
+    def insert_readings_bulk(self, readings: List[GlucoseReading]) -> int:
+        """Insert several readings in one transaction, skipping duplicates like insert_reading"""
+        # Each row repeats its timestamp and value for the duplicate check
+        rows = [row + row[:2] for row in map(GlucoseReading.to_row, readings)]
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO glucose_readings (timestamp, value, trend, unit)
+                SELECT ?, ?, ?, ?
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM glucose_readings WHERE timestamp = ? AND value = ?
+                )
+            ''', rows)
+            conn.commit()
+            inserted = cursor.rowcount
+            logger.info(f"Inserted {inserted} of {len(rows)} glucose readings")
+            return inserted
+    
     def get_latest_readings(self, count: int = 20) -> List[GlucoseReading]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, value, trend, unit
@@ -208,8 +254,30 @@ class GlucoseDatabase:
             
             return readings
     
+    def get_reading_by_id(self, reading_id: int) -> Optional[GlucoseReading]:
+        """Get a single reading by its id"""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, timestamp, value, trend, unit
+                FROM glucose_readings
+                WHERE id = ?
+            ''', (reading_id,))
+            
+            row = cursor.fetchone()
+            if row:
+                return GlucoseReading(
+                    id=row[0],
+                    timestamp=datetime.fromisoformat(row[1]),
+                    value=row[2],
+                    trend=row[3],
+                    unit=row[4]
+                )
+            
+            return None
+    
     def get_readings_since(self, since: datetime) -> List[GlucoseReading]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, value, trend, unit
@@ -234,7 +302,7 @@ class GlucoseDatabase:
     def insert_recommendation(self, timestamp: datetime, rec_type: str, 
                             message: str, glucose_value: float, 
                             parameters: str = None) -> int:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO recommendations 
@@ -253,7 +321,7 @@ class GlucoseDatabase:
             return rec_id
     
     def mark_recommendation_sent(self, rec_id: int):
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE recommendations 
@@ -263,7 +331,7 @@ class GlucoseDatabase:
             conn.commit()
     
     def get_unsent_recommendations(self) -> List[Tuple]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, recommendation_type, message, glucose_value
@@ -277,7 +345,7 @@ class GlucoseDatabase:
         cutoff_date = datetime.now().timestamp() - (days_to_keep * 24 * 60 * 60)
         cutoff_datetime = datetime.fromtimestamp(cutoff_date)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -295,7 +363,7 @@ class GlucoseDatabase:
     
     def insert_insulin_entry(self, entry: InsulinEntry) -> int:
         """Insert insulin entry into database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO insulin_entries 
@@ -315,7 +383,7 @@ class GlucoseDatabase:
     
     def insert_carb_entry(self, entry: CarbEntry) -> int:
         """Insert carbohydrate entry into database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO carb_entries 
@@ -335,7 +403,7 @@ class GlucoseDatabase:
     
     def get_active_insulin(self, current_time: datetime) -> List[InsulinEntry]:
         """Get insulin entries that are still active (within their duration)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, units, insulin_type, duration_minutes, notes
@@ -360,7 +428,7 @@ class GlucoseDatabase:
     
     def insert_iob_override(self, override: IOBOverride) -> int:
         """Insert IOB override (manual IOB setting)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO iob_overrides 
@@ -381,7 +449,7 @@ class GlucoseDatabase:
         """Get most recent IOB override within time limit"""
         cutoff_time = current_time - timedelta(minutes=max_age_minutes)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, iob_value, source, notes
@@ -405,7 +473,7 @@ class GlucoseDatabase:
     
     def get_active_carbs(self, current_time: datetime) -> List[CarbEntry]:
         """Get carb entries that are still being absorbed"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, grams, carb_type, absorption_minutes, notes
@@ -430,7 +498,7 @@ class GlucoseDatabase:
     
     def insert_iob_override(self, override: IOBOverride) -> int:
         """Insert IOB override (manual IOB setting)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO iob_overrides 
@@ -451,7 +519,7 @@ class GlucoseDatabase:
         """Get most recent IOB override within time limit"""
         cutoff_time = current_time - timedelta(minutes=max_age_minutes)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, iob_value, source, notes
@@ -477,7 +545,7 @@ class GlucoseDatabase:
         """Get insulin entries from the last N hours"""
         since_time = datetime.now() - timedelta(hours=hours)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, units, insulin_type, duration_minutes, notes
@@ -502,7 +570,7 @@ class GlucoseDatabase:
     
     def insert_iob_override(self, override: IOBOverride) -> int:
         """Insert IOB override (manual IOB setting)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO iob_overrides 
@@ -523,7 +591,7 @@ class GlucoseDatabase:
         """Get most recent IOB override within time limit"""
         cutoff_time = current_time - timedelta(minutes=max_age_minutes)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, iob_value, source, notes
@@ -549,7 +617,7 @@ class GlucoseDatabase:
         """Get carb entries from the last N hours"""
         since_time = datetime.now() - timedelta(hours=hours)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, grams, carb_type, absorption_minutes, notes
@@ -574,7 +642,7 @@ class GlucoseDatabase:
     
     def insert_iob_override(self, override: IOBOverride) -> int:
         """Insert IOB override (manual IOB setting)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO iob_overrides 
@@ -595,7 +663,7 @@ class GlucoseDatabase:
         """Get most recent IOB override within time limit"""
         cutoff_time = current_time - timedelta(minutes=max_age_minutes)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, timestamp, iob_value, source, notes
@@ -618,7 +686,7 @@ class GlucoseDatabase:
             return None    
     def insert_glucose_note(self, note: GlucoseNote) -> int:
         """Insert glucose note into database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO glucose_notes 
@@ -640,7 +708,7 @@ class GlucoseDatabase:
         """Get recent glucose notes"""
         since_time = datetime.now() - timedelta(hours=hours)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             if note_type:
@@ -28,7 +28,8 @@ class GlucoseMonitor:
 
         # Initialize components
         self.settings = Settings(env_file)
-        self.db = GlucoseDatabase(self.settings.database_path)
+        self.db = GlucoseDatabase(self.settings.database_path,
+                                  wal_mode=self.settings.database_wal_mode)
 
         # Initialize sensor client
         if use_mock:
@@ -1,17 +1,221 @@
+import hmac
 import logging
+import queue
 import requests
 import json
 import threading
 import time
 import re
-from typing import Dict, List, Optional, Callable
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional, Callable, Tuple
 from datetime import datetime
 from ..config import Settings
 from ..commands import CommandProcessor
 from ..commands.formatters import TelegramFormatter
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
+
+def _json_loads(raw: bytes):
+    """Parse a Telegram API response body, preferring orjson when available"""
+    if HAS_ORJSON:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_dumps(payload: Dict) -> bytes:
+    """Serialize a Telegram API request body, preferring orjson when available"""
+    if HAS_ORJSON:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode('utf-8')
+
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+def _create_session() -> requests.Session:
+    """Create a keep-alive session for Telegram API calls"""
+    session = requests.Session()
+    # Only idempotent requests (getUpdates, getMe, ...) are retried here;
+    # 429 responses are handled in _send_message using Telegram's retry_after
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=retries))
+    return session
+
+# getUpdates long-poll window in seconds (Telegram's maximum is 50)
+_LONG_POLL_TIMEOUT = 50
+
+# Update types we handle, and their query-string encoding (built once, not per poll)
+_ALLOWED_UPDATES = ['message', 'channel_post']
+_ALLOWED_UPDATES_PARAM = _json_dumps(_ALLOWED_UPDATES).decode('utf-8')
+
+# Maximum simultaneous webhook connections Telegram may open to us
+_WEBHOOK_MAX_CONNECTIONS = 40
+
+# Pending commands allowed before new ones are rejected as busy
+_COMMAND_QUEUE_SIZE = 256
+
+# Telegram sendMessage limits: ~30 messages/second per bot, ~1/second per chat
+_GLOBAL_SEND_RATE = 30.0
+_CHAT_SEND_RATE = 1.0
+_CHAT_SEND_BURST = 3
+
+# Retries when Telegram answers 429 Too Many Requests
+_MAX_RATE_LIMIT_RETRIES = 2
+
+# Number of distinct alerts remembered for duplicate suppression
+_ALERT_DEDUP_CACHE_SIZE = 32
+
+# Plain number sent as an IOB shortcut: digits with an optional comma or dot
+# decimal separator (e.g. "2", "2.5", "1,2", ".5")
+_IOB_NUMBER_RE = re.compile(r'^(\d+[.,]\d*|\d*[.,]\d+|\d+)$')
+
+
+@dataclass(frozen=True)
+class _AmountCommandSpec:
+    """Argument layout shared by /insulin, /carbs and /iob: <amount> [kind] [notes...]"""
+    default_kind: str
+    help_text: str
+    usage_error: str
+    error_prefix: str
+    
+    def parse(self, args: List[str]) -> Tuple[float, str, Optional[str]]:
+        """Split args into amount, kind and notes (raises ValueError on a bad amount)"""
+        amount = float(args[0])
+        kind = args[1] if len(args) > 1 else self.default_kind
+        # Tokens are non-empty, so only a missing notes part joins to ''
+        notes = ' '.join(args[2:]) or None
+        return amount, kind, notes
+
+
+_INSULIN_SPEC = _AmountCommandSpec(
+    default_kind='rapid',
+    help_text=("Log insulin dose\n"
+               "Usage: /insulin <units> [type] [notes]\n"
+               "       /i <units> [type] [notes]\n"
+               "Example: /insulin 2.5 rapid correction dose\n"
+               "Types: rapid (default), long, intermediate"),
+    usage_error="Invalid format. Usage: /insulin <units> [type] [notes]\nExample: /insulin 2.5 rapid",
+    error_prefix="Error logging insulin"
+)
+
+_CARBS_SPEC = _AmountCommandSpec(
+    default_kind='mixed',
+    help_text=("Log carbohydrate intake\n"
+               "Usage: /carbs <grams> [type] [notes]\n"
+               "       /c <grams> [type] [notes]\n"
+               "Example: /carbs 45 fast orange juice\n"
+               "Types: fast, slow, mixed (default)"),
+    usage_error="Invalid format. Usage: /carbs <grams> [type] [notes]\nExample: /carbs 30 fast",
+    error_prefix="Error logging carbs"
+)
+
+_IOB_SPEC = _AmountCommandSpec(
+    default_kind='manual',
+    help_text=("Set current IOB from pump/Omnipod\n"
+               "Usage: /iob <units> [source] [notes]\n"
+               "       /setiob <units> [source] [notes]\n"
+               "Example: /iob 0.2 omnipod\n"
+               "Sources: omnipod, pump, manual (default)"),
+    usage_error="Invalid format. Usage: /iob <units> [source] [notes]\nExample: /iob 0.2 omnipod",
+    error_prefix="Error setting IOB override"
+)
+
+
+class _TokenBucket:
+    """Thread-safe token bucket that reports how long a caller must wait"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """Take one token and return the seconds to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class _SendRateLimiter:
+    """Keeps outbound messages under Telegram's global and per-chat limits"""
+    
+    def __init__(self):
+        self.global_bucket = _TokenBucket(_GLOBAL_SEND_RATE, _GLOBAL_SEND_RATE)
+        self.chat_buckets = {}
+        self.lock = threading.Lock()
+    
+    def acquire(self, chat_id: str):
+        """Block until a message may be sent to chat_id"""
+        with self.lock:
+            chat_bucket = self.chat_buckets.get(chat_id)
+            if chat_bucket is None:
+                chat_bucket = _TokenBucket(_CHAT_SEND_RATE, _CHAT_SEND_BURST)
+                self.chat_buckets[chat_id] = chat_bucket
+        
+        wait_seconds = max(self.global_bucket.reserve(), chat_bucket.reserve())
+        if wait_seconds > 0:
+            logger.debug(f"Rate limiting Telegram send for {wait_seconds:.2f}s")
+            time.sleep(wait_seconds)
+
+
+class _WebhookRequestHandler(BaseHTTPRequestHandler):
+    """Receives Telegram webhook updates and hands them to the notifier"""
+    
+    def do_POST(self):
+        notifier = self.server.notifier
+        secret_token = self.server.secret_token
+        
+        # Telegram echoes the secret token registered with setWebhook; without a
+        # match the update could come from anyone able to reach the port
+        received_token = self.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if not secret_token or not hmac.compare_digest(received_token.encode(), secret_token.encode()):
+            logger.warning(f"Rejected webhook request with invalid secret from {self.client_address[0]}")
+            self.send_response(403)
+            self.end_headers()
+            return
+        
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            update = _json_loads(self.rfile.read(length))
+        except ValueError as e:
+            logger.error(f"Invalid webhook payload: {e}")
+            self.send_response(400)
+            self.end_headers()
+            return
+        
+        # Acknowledge first so Telegram does not redeliver while the command runs
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        self.wfile.flush()
+        
+        try:
+            notifier._process_update(update)
+        except Exception as e:
+            logger.error(f"Error processing webhook update: {e}")
+    
+    def log_message(self, format, *args):
+        logger.debug(f"Webhook request: {format % args}")
+
+
 class TelegramNotifier:
     """Handles sending notifications to Telegram and processing incoming messages"""
     
@@ -21,6 +225,9 @@ class TelegramNotifier:
         self.chat_id = settings.telegram_chat_id
         self.enabled = bool(self.bot_url and self.chat_id)
         
+        # Connections are reused across sends, long polls and command replies
+        self._session = _create_session()
+        
         # Message handling
         self.running = False
         self.polling_thread = None
@@ -28,8 +235,24 @@ class TelegramNotifier:
         self.command_handlers = {}
         self.message_handler = None
         
-        # Status message tracking
+        # Command workers decouple slow handlers from update ingress; each
+        # worker drains its own queue so one chat's commands stay in order
+        self._command_queues = []
+        self._command_workers = []
+        
+        # Webhook ingress (used instead of polling when a webhook URL is configured)
+        self.webhook_server = None
+        self.webhook_thread = None
+        
+        # Status message tracking (wall clock for display, monotonic for scheduling)
         self.last_message_time = None
+        self._last_message_mono = None
+        
+        # Outbound throttle shared by alerts, status updates and command replies
+        self._rate_limiter = _SendRateLimiter()
+        
+        # Recently sent alerts: (alert_type, urgency, rounded value) -> monotonic send time
+        self._recent_alerts = OrderedDict()
         
         # Extract bot token from URL for API calls
         if self.bot_url:
@@ -77,6 +300,12 @@ class TelegramNotifier:
         if not self.enabled:
             return False
         
+        # Drop repeats of the same alert within the de-duplication window
+        alert_key = (alert_type, urgency, round(current_value or 0))
+        if self._is_duplicate_alert(alert_key):
+            logger.info(f"Suppressed duplicate {alert_type} alert")
+            return True
+        
         try:
             formatted_message = self._format_alert_message(
                 alert_type, message, current_value, urgency
@@ -84,6 +313,7 @@ class TelegramNotifier:
             
             success = self._send_message(formatted_message)
             if success:
+                self._remember_alert(alert_key)
                 logger.info(f"Sent {alert_type} alert to Telegram")
             else:
                 logger.error(f"Failed to send {alert_type} alert to Telegram")
@@ -94,6 +324,25 @@ class TelegramNotifier:
             logger.error(f"Error sending Telegram alert: {e}")
             return False
     
+    def _is_duplicate_alert(self, alert_key: tuple) -> bool:
+        """Check if an identical alert was sent within the de-duplication window"""
+        dedup_seconds = self.settings.telegram_alert_dedup_seconds
+        if dedup_seconds <= 0:
+            return False
+        
+        sent_at = self._recent_alerts.get(alert_key)
+        if sent_at is None:
+            return False
+        
+        return time.monotonic() - sent_at < dedup_seconds
+    
+    def _remember_alert(self, alert_key: tuple):
+        """Record a sent alert, evicting the oldest entries beyond the cache size"""
+        self._recent_alerts[alert_key] = time.monotonic()
+        self._recent_alerts.move_to_end(alert_key)
+        while len(self._recent_alerts) > _ALERT_DEDUP_CACHE_SIZE:
+            self._recent_alerts.popitem(last=False)
+    
     def should_send_status_message(self) -> bool:
         """Check if a periodic status message should be sent"""
         if not self.enabled:
@@ -107,11 +356,12 @@ class TelegramNotifier:
         if not self._is_within_status_hours():
             return False
             
-        # Check if enough time has passed since last message
-        if self.last_message_time is None:
+        # Check if enough time has passed since last message. Uses the monotonic
+        # clock so NTP steps or DST changes cannot stall or burst status updates.
+        if self._last_message_mono is None:
             return True
             
-        time_since_last = (datetime.now() - self.last_message_time).total_seconds()
+        time_since_last = time.monotonic() - self._last_message_mono
         interval_seconds = self.settings.telegram_status_interval_minutes * 60
         
         return time_since_last >= interval_seconds
@@ -276,15 +526,28 @@ class TelegramNotifier:
             'parse_mode': 'Markdown'
         }
         
+        body = _json_dumps(payload)
+        
         try:
-            response = requests.post(
-                self.bot_url,
-                json=payload,
-                timeout=30
-            )
+            for attempt in range(_MAX_RATE_LIMIT_RETRIES + 1):
+                self._rate_limiter.acquire(self.chat_id)
+                response = self._session.post(
+                    self.bot_url,
+                    data=body,
+                    headers=_JSON_HEADERS,
+                    timeout=30
+                )
+                
+                if response.status_code != 429 or attempt == _MAX_RATE_LIMIT_RETRIES:
+                    break
+                
+                retry_after = self._get_retry_after(response)
+                logger.warning(f"Telegram rate limit hit, retrying in {retry_after}s")
+                time.sleep(retry_after)
             
             if response.status_code == 200:
                 self.last_message_time = datetime.now()
+                self._last_message_mono = time.monotonic()
                 return True
             else:
                 logger.error(f"Telegram API error: {response.status_code} - {response.text}")
@@ -294,6 +557,13 @@ class TelegramNotifier:
             logger.error(f"Request error sending to Telegram: {e}")
             return False
     
+    def _get_retry_after(self, response) -> float:
+        """Extract the retry_after hint from a 429 response (defaults to 1 second)"""
+        try:
+            return float(_json_loads(response.content)['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            return 1.0
+    
     def _get_trend_emoji(self, trend: str) -> str:
         """Get emoji for trend"""
         trend_emojis = {
@@ -342,8 +612,8 @@ class TelegramNotifier:
         # Test connection without sending message
         try:
             url = f"{self.api_url}/getMe"
-            response = requests.get(url, timeout=10)
-            return response.status_code == 200 and response.json().get('ok', False)
+            response = self._session.get(url, timeout=10)
+            return response.status_code == 200 and _json_loads(response.content).get('ok', False)
         except Exception as e:
             logger.error(f"Telegram connection test failed: {e}")
             return False
@@ -355,10 +625,10 @@ class TelegramNotifier:
         
         try:
             url = f"{self.api_url.replace('/sendMessage', '')}/getMe"
-            response = requests.get(url, timeout=10)
+            response = self._session.get(url, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 return data
             else:
                 return {"error": f"HTTP {response.status_code}", "response": response.text}
@@ -372,10 +642,10 @@ class TelegramNotifier:
         
         try:
             url = f"{self.api_url.replace('/sendMessage', '')}/getWebhookInfo"
-            response = requests.get(url, timeout=10)
+            response = self._session.get(url, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 return data
             else:
                 return {"error": f"HTTP {response.status_code}", "response": response.text}
@@ -390,15 +660,94 @@ class TelegramNotifier:
         try:
             url = f"{self.api_url.replace('/sendMessage', '')}/setWebhook"
             data = {"url": ""}  # Empty URL clears the webhook
-            response = requests.post(url, json=data, timeout=10)
+            response = self._session.post(url, data=_json_dumps(data),
+                                     headers=_JSON_HEADERS, timeout=10)
             
             if response.status_code == 200:
-                return response.json()
+                return _json_loads(response.content)
             else:
                 return {"error": f"HTTP {response.status_code}", "response": response.text}
         except Exception as e:
             return {"error": str(e)}
     
+    def set_webhook(self, webhook_url: str, secret_token: Optional[str] = None) -> bool:
+        """Register a webhook URL so Telegram pushes updates instead of being polled"""
+        if not self.api_url:
+            return False
+        
+        data = {
+            'url': webhook_url,
+            'max_connections': _WEBHOOK_MAX_CONNECTIONS,
+            'allowed_updates': _ALLOWED_UPDATES
+        }
+        if secret_token:
+            data['secret_token'] = secret_token
+        
+        try:
+            url = f"{self.api_url}/setWebhook"
+            response = self._session.post(url, data=_json_dumps(data),
+                                     headers=_JSON_HEADERS, timeout=10)
+            
+            if response.status_code == 200 and _json_loads(response.content).get('ok', False):
+                logger.info(f"Registered Telegram webhook: {webhook_url}")
+                return True
+            
+            logger.error(f"Failed to set Telegram webhook: {response.status_code} - {response.text}")
+            return False
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Request error setting Telegram webhook: {e}")
+            return False
+    
+    def start_webhook_server(self, webhook_url: str, secret_token: Optional[str] = None,
+                             port: int = 8443, host: str = '127.0.0.1') -> bool:
+        """Register the webhook and start a local HTTP server to receive updates"""
+        if not self.enabled or not self.api_url:
+            logger.warning("Cannot start webhook server - Telegram not properly configured")
+            return False
+        
+        if not secret_token:
+            # Updates drive insulin/carb logging, so never accept unauthenticated ones
+            logger.error("Refusing to start webhook server without TELEGRAM_WEBHOOK_SECRET")
+            return False
+        
+        if self.webhook_server:
+            logger.debug("Webhook server already running")
+            return True
+        
+        try:
+            server = ThreadingHTTPServer((host, port), _WebhookRequestHandler)
+        except OSError as e:
+            logger.error(f"Failed to bind webhook server on {host}:{port}: {e}")
+            return False
+        
+        server.daemon_threads = True
+        server.notifier = self
+        server.secret_token = secret_token
+        
+        if not self.set_webhook(webhook_url, secret_token):
+            server.server_close()
+            return False
+        
+        self.webhook_server = server
+        self._start_command_workers()
+        self.webhook_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        self.webhook_thread.start()
+        logger.info(f"Started Telegram webhook server on {host}:{port} for chat_id: {self.chat_id}")
+        return True
+    
+    def stop_webhook_server(self):
+        """Stop the webhook HTTP server"""
+        if not self.webhook_server:
+            return
+        
+        self.webhook_server.shutdown()
+        self.webhook_server.server_close()
+        self.webhook_server = None
+        if self.webhook_thread and self.webhook_thread.is_alive():
+            self.webhook_thread.join(timeout=2.0)
+        self._stop_command_workers()
+        logger.info("Stopped Telegram webhook server")
+    
     def start_message_polling(self):
         """Start polling for incoming messages"""
         if not self.enabled or not self.api_url:
@@ -411,6 +760,7 @@ class TelegramNotifier:
             return
         
         self.running = True
+        self._start_command_workers()
         self.polling_thread = threading.Thread(target=self._poll_messages, daemon=True)
         self.polling_thread.start()
         logger.info(f"Started Telegram message polling for chat_id: {self.chat_id}")
@@ -421,8 +771,64 @@ class TelegramNotifier:
         self.running = False
         if self.polling_thread and self.polling_thread.is_alive():
             self.polling_thread.join(timeout=2.0)
+        self._stop_command_workers()
         logger.info("Stopped Telegram message polling")
     
+    def _start_command_workers(self):
+        """Start the worker threads that execute queued commands"""
+        if self._command_workers:
+            return
+        
+        for i in range(max(1, self.settings.telegram_workers)):
+            command_queue = queue.Queue(maxsize=_COMMAND_QUEUE_SIZE)
+            worker = threading.Thread(target=self._command_worker, args=(command_queue,),
+                                      name=f"telegram-command-{i}", daemon=True)
+            worker.start()
+            self._command_queues.append(command_queue)
+            self._command_workers.append(worker)
+        logger.debug(f"Started {len(self._command_workers)} Telegram command worker(s)")
+    
+    def _stop_command_workers(self):
+        """Signal command workers to exit once queued commands are done"""
+        if not self._command_workers:
+            return
+        
+        for command_queue in self._command_queues:
+            command_queue.put(None)
+        for worker in self._command_workers:
+            worker.join(timeout=2.0)
+        self._command_queues = []
+        self._command_workers = []
+    
+    def _command_worker(self, command_queue: queue.Queue):
+        """Execute queued commands until a stop sentinel is received"""
+        while True:
+            item = command_queue.get()
+            try:
+                if item is None:
+                    return
+                func, args = item
+                func(*args)
+            except Exception as e:
+                logger.error(f"Error in Telegram command worker: {e}")
+            finally:
+                command_queue.task_done()
+    
+    def _submit(self, chat_id: str, func: Callable, *args):
+        """Run func on the chat's command worker, or inline when no workers are running"""
+        if not self._command_workers:
+            func(*args)
+            return
+        
+        # Route each chat to one worker so its commands run in the order sent;
+        # a /status must not overtake the /insulin logged before it
+        command_queue = self._command_queues[hash(chat_id) % len(self._command_queues)]
+        try:
+            command_queue.put_nowait((func, args))
+        except queue.Full:
+            logger.warning("Telegram command queue full, rejecting message")
+            self._send_message("Busy processing earlier commands, please retry shortly")
+    
     def register_command_handler(self, command: str, handler: Callable):
         """Register a handler for a specific command"""
         self.command_handlers[command.lower()] = handler
@@ -452,11 +858,11 @@ class TelegramNotifier:
                     logger.debug("No updates received")
                 
                 # Log periodic status
-                if poll_count % 30 == 0:  # Every 30 polls (30 seconds)
+                if poll_count % 30 == 0:  # Every 30 polls (up to 25 minutes of long polling)
                     logger.info(f"Message polling active - {poll_count} polls completed")
                 
-                # Sleep between polls
-                time.sleep(1)
+                # No sleep between polls - getUpdates blocks server-side until
+                # an update arrives or the long-poll window expires
                 
             except Exception as e:
                 logger.error(f"Error polling Telegram messages: {e}")
@@ -474,8 +880,8 @@ class TelegramNotifier:
         try:
             url = f"{self.api_url}/getUpdates"
             params = {
-                'timeout': 10,
-                'allowed_updates': ['message', 'channel_post']
+                'timeout': _LONG_POLL_TIMEOUT,
+                'allowed_updates': _ALLOWED_UPDATES_PARAM
             }
             
             if self.last_update_id:
@@ -486,11 +892,12 @@ class TelegramNotifier:
             
             logger.debug(f"Making request to: {url} with params: {params}")
             
-            response = requests.get(url, params=params, timeout=15)
+            # Read timeout must outlast the server-side long-poll window
+            response = self._session.get(url, params=params, timeout=_LONG_POLL_TIMEOUT + 5)
             logger.debug(f"Response status: {response.status_code}")
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 logger.debug(f"Response data keys: {data.keys()}")
                 logger.debug(f"Response ok: {data.get('ok')}")
                 
@@ -505,8 +912,9 @@ class TelegramNotifier:
                         logger.info(f"Updated last_update_id: {old_update_id} -> {self.last_update_id}")
                         
                         # Log each update for debugging
-                        for i, update in enumerate(updates):
-                            logger.debug(f"Update {i}: {json.dumps(update, indent=2)}")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            for i, update in enumerate(updates):
+                                logger.debug(f"Update {i}: {json.dumps(update, indent=2)}")
                     
                     return updates
                 elif data.get('ok') and not data.get('result'):
@@ -577,34 +985,39 @@ class TelegramNotifier:
         # Handle commands (starting with /)
         if text.startswith('/'):
             logger.info(f"Processing command: {text.split()[0]}")
-            self._handle_command(text, message)
+            self._submit(chat_id, self._handle_command, text, message)
         else:
             # Check if message is a plain number (IOB shortcut)
             iob_match = self._is_iob_number(text)
             if iob_match:
                 logger.info(f"Processing IOB shortcut: {text}")
-                self._handle_iob_shortcut(iob_match, message)
+                self._submit(chat_id, self._handle_iob_shortcut, iob_match, message)
             else:
                 # Handle regular messages
                 logger.info(f"Processing regular message: {text[:50]}...")
                 if self.message_handler:
-                    try:
-                        self.message_handler(text, message)
-                    except Exception as e:
-                        logger.error(f"Error in message handler: {e}")
-                        self._send_message(f"Error processing message: {e}")
+                    self._submit(chat_id, self._run_message_handler, text, message)
                 else:
                     logger.debug("No general message handler registered")
     
+    def _run_message_handler(self, text: str, message: Dict):
+        """Run the registered general message handler"""
+        try:
+            self.message_handler(text, message)
+        except Exception as e:
+            logger.error(f"Error in message handler: {e}")
+            self._send_message(f"Error processing message: {e}")
+    
     def _handle_command(self, text: str, message: Dict):
         """Handle a command message"""
         parts = text.split()
         command = parts[0][1:].lower()  # Remove / prefix
         args = parts[1:] if len(parts) > 1 else []
         
-        if command in self.command_handlers:
+        handler = self.command_handlers.get(command)
+        if handler is not None:
             try:
-                result = self.command_handlers[command](args, message)
+                result = handler(args, message)
                 if result:
                     # Send the command response
                     success = self._send_message(result)
@@ -636,11 +1049,20 @@ class TelegramNotifier:
         """Check if text is a plain number (IOB shortcut). Supports both comma and dot as decimal separator."""
         # Remove any whitespace
         text = text.strip()
-        
-        # Pattern matches: digits optionally followed by decimal separator and more digits
-        # Or just digits followed by decimal separator
-        pattern = r'^(\d+[.,]\d*|\d*[.,]\d+|\d+)$'
-        match = re.match(pattern, text)
+
+        # Cheap first-character check rejects ordinary chat text before the regex runs
+        if not text:
+            return None
+        first_char = text[0]
+        if first_char not in '.,' and not first_char.isdecimal():
+            return None
+
+        # Whole numbers ("2") are the common case and need no regex
+        if text.isdecimal():
+            value = int(text)
+            return float(value) if value <= 20 else None
+
+        match = _IOB_NUMBER_RE.match(text)
         
         if match:
             try:
@@ -675,6 +1097,9 @@ class TelegramNotifier:
 class TelegramCommandBridge:
     """Bridges Telegram commands to shell commands"""
     
+    __slots__ = ('telegram', 'user_input', 'db', 'settings', 'command_processor', 'formatter',
+                 '_cmd_table')
+    
     def __init__(self, telegram_notifier: TelegramNotifier, user_input_handler, db, settings: Settings):
         self.telegram = telegram_notifier
         self.user_input = user_input_handler
@@ -693,13 +1118,22 @@ class TelegramCommandBridge:
         # Register command handlers
         self._register_commands()
         
-        # Start message polling if Telegram is enabled
+        # Receive updates via webhook when configured, otherwise fall back to polling
         if self.telegram.enabled:
-            self.telegram.start_message_polling()
+            webhook_url = settings.telegram_webhook_url
+            if not (webhook_url and self.enable_webhook(webhook_url, settings.telegram_webhook_secret)):
+                self.telegram.start_message_polling()
+    
+    def enable_webhook(self, url: str, secret_token: Optional[str] = None) -> bool:
+        """Switch update delivery to a Telegram webhook"""
+        return self.telegram.start_webhook_server(
+            url, secret_token, self.settings.telegram_webhook_port,
+            self.settings.telegram_webhook_host
+        )
     
     def _register_commands(self):
-        """Register all available commands"""
-        commands = {
+        """Build the command table once and register it with the notifier"""
+        self._cmd_table = {
             'insulin': self._handle_insulin,
             'i': self._handle_insulin,
             'carbs': self._handle_carbs,
@@ -725,74 +1159,40 @@ class TelegramCommandBridge:
             'notes': self._handle_notes,
         }
         
-        for command, handler in commands.items():
+        for command, handler in self._cmd_table.items():
             self.telegram.register_command_handler(command, handler)
     
-    def _handle_insulin(self, args: List[str], message: Dict) -> str:
-        """Handle insulin command via Telegram"""
+    def _run_amount_command(self, spec: _AmountCommandSpec, args: List[str],
+                            execute: Callable, format_result: Callable) -> str:
+        """Parse <amount> [kind] [notes] per spec, execute it and format the result"""
         if not args:
-            return ("Log insulin dose\n"
-                   "Usage: /insulin <units> [type] [notes]\n"
-                   "       /i <units> [type] [notes]\n"
-                   "Example: /insulin 2.5 rapid correction dose\n"
-                   "Types: rapid (default), long, intermediate")
+            return spec.help_text
         
         try:
-            units = float(args[0])
-            insulin_type = args[1] if len(args) > 1 else 'rapid'
-            notes = ' '.join(args[2:]) if len(args) > 2 else None
-            
-            result = self.command_processor.execute_insulin(units, insulin_type, notes)
-            return self.formatter.format_insulin_result(result)
-            
+            result = execute(*spec.parse(args))
+            return format_result(result)
         except (ValueError, IndexError):
-            return "Invalid format. Usage: /insulin <units> [type] [notes]\nExample: /insulin 2.5 rapid"
+            return spec.usage_error
         except Exception as e:
-            return f"Error logging insulin: {e}"
+            return f"{spec.error_prefix}: {e}"
+    
+    def _handle_insulin(self, args: List[str], message: Dict) -> str:
+        """Handle insulin command via Telegram"""
+        return self._run_amount_command(_INSULIN_SPEC, args,
+                                        self.command_processor.execute_insulin,
+                                        self.formatter.format_insulin_result)
     
     def _handle_carbs(self, args: List[str], message: Dict) -> str:
         """Handle carbs command via Telegram"""
-        if not args:
-            return ("Log carbohydrate intake\n"
-                   "Usage: /carbs <grams> [type] [notes]\n"
-                   "       /c <grams> [type] [notes]\n"
-                   "Example: /carbs 45 fast orange juice\n"
-                   "Types: fast, slow, mixed (default)")
-        
-        try:
-            grams = float(args[0])
-            carb_type = args[1] if len(args) > 1 else 'mixed'
-            notes = ' '.join(args[2:]) if len(args) > 2 else None
-            
-            result = self.command_processor.execute_carbs(grams, carb_type, notes)
-            return self.formatter.format_carbs_result(result)
-            
-        except (ValueError, IndexError):
-            return "Invalid format. Usage: /carbs <grams> [type] [notes]\nExample: /carbs 30 fast"
-        except Exception as e:
-            return f"Error logging carbs: {e}"
+        return self._run_amount_command(_CARBS_SPEC, args,
+                                        self.command_processor.execute_carbs,
+                                        self.formatter.format_carbs_result)
     
     def _handle_iob(self, args: List[str], message: Dict) -> str:
         """Handle IOB override command via Telegram"""
-        if not args:
-            return ("Set current IOB from pump/Omnipod\n"
-                   "Usage: /iob <units> [source] [notes]\n"
-                   "       /setiob <units> [source] [notes]\n"
-                   "Example: /iob 0.2 omnipod\n"
-                   "Sources: omnipod, pump, manual (default)")
-        
-        try:
-            iob_value = float(args[0])
-            source = args[1] if len(args) > 1 else 'manual'
-            notes = ' '.join(args[2:]) if len(args) > 2 else None
-            
-            result = self.command_processor.execute_iob_override(iob_value, source, notes)
-            return self.formatter.format_iob_override_result(result)
-            
-        except (ValueError, IndexError):
-            return "Invalid format. Usage: /iob <units> [source] [notes]\nExample: /iob 0.2 omnipod"
-        except Exception as e:
-            return f"Error setting IOB override: {e}"
+        return self._run_amount_command(_IOB_SPEC, args,
+                                        self.command_processor.execute_iob_override,
+                                        self.formatter.format_iob_override_result)
     
     def _handle_status(self, args: List[str], message: Dict) -> str:
         """Handle status command via Telegram"""
@@ -926,4 +1326,5 @@ class TelegramCommandBridge:
     def stop(self):
         """Stop the Telegram command bridge"""
         if self.telegram.enabled:
+            self.telegram.stop_webhook_server()
             self.telegram.stop_message_polling()
\ No newline at end of file
@@ -1,4 +1,5 @@
 import logging
+import threading
 import time
 from datetime import datetime, timedelta
 from typing import Optional, List
@@ -8,15 +9,64 @@ from ..config import Settings
 
 logger = logging.getLogger(__name__)
 
+# Repeated availability checks within this window reuse the previous answer
+_AVAILABILITY_CHECK_SECONDS = 1.0
+
+def _monotonic_deadline(when: Optional[datetime]) -> Optional[float]:
+    """Translate a wall-clock datetime into a time.monotonic() deadline"""
+    if when is None:
+        return None
+    return time.monotonic() + (when - datetime.now()).total_seconds()
+
+
+# Dexcom Share trend descriptions mapped to internal trend names
+_TREND_MAP = {
+    "rising quickly": "very_fast_up",
+    "rising": "fast_up",
+    "rising slightly": "up",
+    "steady": "no_change",
+    "falling slightly": "down",
+    "falling": "fast_down",
+    "falling quickly": "very_fast_down"
+}
+
 class DexcomClient:
+    __slots__ = (
+        'settings', 'dexcom', 'last_reading_time', 'last_reading_value',
+        '_next_expected_reading_time', '_next_reading_deadline',
+        '_cached_bg', '_cached_bg_expires', '_share_lock',
+        '_last_check_mono', '_last_check_result'
+    )
+    
     def __init__(self, settings: Settings):
         self.settings = settings
         self.dexcom = None
         self.last_reading_time = None
         self.last_reading_value = None
+        self._last_check_result = False
         self.next_expected_reading_time = None  # When next reading should be available (timestamp + 305s)
+        
+        # Last Share API reading, reused until the sensor can have a newer one
+        self._cached_bg = None
+        self._cached_bg_expires = None
+        # Serializes Share API calls from the monitor loop and command threads
+        self._share_lock = threading.Lock()
+        
         self._connect()
     
+    @property
+    def next_expected_reading_time(self) -> Optional[datetime]:
+        """Wall-clock time the next reading should be available (for display)"""
+        return self._next_expected_reading_time
+    
+    @next_expected_reading_time.setter
+    def next_expected_reading_time(self, value: Optional[datetime]):
+        # Convert once to a monotonic deadline so the frequent availability
+        # checks are float comparisons unaffected by wall-clock changes
+        self._next_expected_reading_time = value
+        self._next_reading_deadline = _monotonic_deadline(value)
+        self._last_check_mono = None
+    
     def _connect(self):
         try:
             self.dexcom = Dexcom(
@@ -26,12 +76,36 @@ class DexcomClient:
             )
             logger.info("Successfully connected to Dexcom")
         except Exception as e:
-            logger.error(f"Failed to connect to Dexcom: {e}")
+            logger.error("Failed to connect to Dexcom: %s", e)
             raise
     
+    def _fetch_current_bg(self):
+        """Fetch the current reading, reusing the cached one until its interval has elapsed"""
+        with self._share_lock:
+            # Concurrent callers wait for the in-flight request and share its result
+            if self._cached_bg is not None and time.monotonic() < self._cached_bg_expires:
+                logger.debug("Using cached Dexcom reading")
+                return self._cached_bg
+            
+            bg = self.dexcom.get_current_glucose_reading()
+            if bg is not None and bg.time is not None:
+                self._cached_bg = bg
+                self._cached_bg_expires = _monotonic_deadline(
+                    bg.time + timedelta(seconds=self.settings.sensor_reading_interval_seconds)
+                )
+            return bg
+    
+    def _invalidate_cache(self):
+        """Drop the cached reading so the next request goes to Dexcom"""
+        self._cached_bg = None
+        self._cached_bg_expires = None
+    
     def get_current_reading(self) -> Optional[GlucoseReading]:
+        # Share API and network errors propagate so the monitor can reconnect;
+        # only malformed readings are handled here
+        bg = None
         try:
-            bg = self.dexcom.get_current_glucose_reading()
+            bg = self._fetch_current_bg()
             if bg is None:
                 logger.warning("No current glucose reading available")
                 return None
@@ -66,103 +140,110 @@ class DexcomClient:
             
             # Calculate next expected reading time: timestamp + configured interval
             self.next_expected_reading_time = timestamp + timedelta(seconds=self.settings.sensor_reading_interval_seconds)
-            logger.info(f"Next reading expected at: {self.next_expected_reading_time.strftime('%H:%M:%S')} (timestamp + {self.settings.sensor_reading_interval_seconds}s)")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Next reading expected at: %s (timestamp + %ss)",
+                            self.next_expected_reading_time.strftime('%H:%M:%S'),
+                            self.settings.sensor_reading_interval_seconds)
             
-            logger.info(f"Retrieved glucose reading: {reading.value} {reading.unit}, trend: {reading.trend}, timestamp: {reading.timestamp}")
+            logger.info("Retrieved glucose reading: %s %s, trend: %s, timestamp: %s",
+                        reading.value, reading.unit, reading.trend, reading.timestamp)
             return reading
             
-        except Exception as e:
-            logger.error(f"Error retrieving glucose reading: {e}")
-            logger.debug(f"Available attributes in bg object: {dir(bg) if 'bg' in locals() else 'bg not available'}")
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.error("Error retrieving glucose reading: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Available attributes in bg object: %s",
+                             dir(bg) if bg is not None else 'bg not available')
             return None
     
     def get_recent_readings(self, hours: int = 3) -> List[GlucoseReading]:
         try:
-            readings = self.dexcom.get_glucose_readings(minutes=hours * 60)
-            glucose_readings = []
+            with self._share_lock:
+                readings = self.dexcom.get_glucose_readings(minutes=hours * 60)
             
-            for bg in readings:
-                # Use correct pydexcom attribute names
-                timestamp = bg.time
-                value = bg.value
-                trend_desc = bg.trend_description
-                
-                if value is not None:
-                    reading = GlucoseReading(
-                        timestamp=timestamp,
-                        value=float(value),
-                        trend=self._map_trend(trend_desc),
-                        unit="mg/dL"
-                    )
-                    glucose_readings.append(reading)
+            # Build all readings in one pass; map_trend is bound once outside the loop
+            map_trend = self._map_trend
+            glucose_readings = [
+                GlucoseReading(
+                    timestamp=bg.time,
+                    value=float(bg.value),
+                    trend=map_trend(bg.trend_description),
+                    unit="mg/dL"
+                )
+                for bg in readings if bg.value is not None
+            ]
             
-            logger.info(f"Retrieved {len(glucose_readings)} recent readings")
+            logger.info("Retrieved %d recent readings", len(glucose_readings))
             return glucose_readings
             
         except Exception as e:
-            logger.error(f"Error retrieving recent readings: {e}")
+            logger.error("Error retrieving recent readings: %s", e)
             return []
     
     def _map_trend(self, trend_description: str) -> str:
-        trend_mapping = {
-            "rising quickly": "very_fast_up",
-            "rising": "fast_up", 
-            "rising slightly": "up",
-            "steady": "no_change",
-            "falling slightly": "down",
-            "falling": "fast_down",
-            "falling quickly": "very_fast_down"
-        }
-        
-        if trend_description:
-            trend_lower = trend_description.lower()
-            return trend_mapping.get(trend_lower, "no_change")
+        if not trend_description:
+            return "no_change"
         
-        return "no_change"
+        # pydexcom already reports lowercase descriptions; only lower() on a miss
+        trend = _TREND_MAP.get(trend_description)
+        if trend is None:
+            trend = _TREND_MAP.get(trend_description.lower(), "no_change")
+        return trend
     
     def is_new_reading_available(self) -> bool:
         # Always allow first reading
-        if self.next_expected_reading_time is None:
+        if self._next_reading_deadline is None:
             return True
         
+        # Answer repeated polls from the previous check without re-logging
+        now = time.monotonic()
+        if (self._last_check_mono is not None and
+                now - self._last_check_mono < _AVAILABILITY_CHECK_SECONDS):
+            return self._last_check_result
+        
         # Check if we've reached the expected next reading time
-        now = datetime.now()
-        if now >= self.next_expected_reading_time:
-            logger.info(f"Expected reading time reached ({self.next_expected_reading_time.strftime('%H:%M:%S')})")
-            return True
+        time_until_next = self._next_reading_deadline - now
+        available = time_until_next <= 0
+        if not available:
+            logger.info("Next reading not due for %.0f seconds", time_until_next)
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info("Expected reading time reached (%s)",
+                        self.next_expected_reading_time.strftime('%H:%M:%S'))
         
-        time_until_next = (self.next_expected_reading_time - now).total_seconds()
-        logger.info(f"Next reading not due for {time_until_next:.0f} seconds")
-        return False
+        self._last_check_mono = now
+        self._last_check_result = available
+        return available
     
     def wait_for_next_reading(self) -> float:
         # If no expected time set, don't wait
-        if self.next_expected_reading_time is None:
+        if self._next_reading_deadline is None:
             return 0.0
         
-        now = datetime.now()
-        if now >= self.next_expected_reading_time:
+        wait_seconds = self._next_reading_deadline - time.monotonic()
+        if wait_seconds <= 0:
             return 0.0
         
-        wait_seconds = (self.next_expected_reading_time - now).total_seconds()
-        logger.info(f"Waiting {wait_seconds:.0f} seconds for next reading (based on sensor timestamp + {self.settings.sensor_reading_interval_seconds}s)")
+        logger.info("Waiting %.0f seconds for next reading (based on sensor timestamp + %ss)",
+                    wait_seconds, self.settings.sensor_reading_interval_seconds)
         return wait_seconds
     
     
     def reconnect(self):
         logger.info("Attempting to reconnect to Dexcom...")
+        self._invalidate_cache()
         try:
             self._connect()
             return True
         except Exception as e:
-            logger.error(f"Reconnection failed: {e}")
+            logger.error("Reconnection failed: %s", e)
             return False
     
     def test_connection(self) -> bool:
         try:
-            test_reading = self.dexcom.get_current_glucose_reading()
+            # Goes through the cache so the first monitoring cycle reuses this reading
+            test_reading = self._fetch_current_bg()
             logger.info("Dexcom connection test successful")
             return True
         except Exception as e:
-            logger.error(f"Dexcom connection test failed: {e}")
+            logger.error("Dexcom connection test failed: %s", e)
             return False
\ No newline at end of file
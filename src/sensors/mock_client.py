@@ -1,18 +1,79 @@
+import bisect
+import functools
 import logging
-import math
-import random
+import time
+from collections import deque
+import numpy as np
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from ..database import GlucoseReading
 from ..config import Settings
 
 logger = logging.getLogger(__name__)
 
+# Trend classification by reading-to-reading difference. Falling bounds are
+# inclusive on the upper side and rising bounds on the lower side, so a
+# difference of exactly +/-2 stays "no_change".
+_FALLING_THRESHOLDS = (-10, -5, -2)
+_RISING_THRESHOLDS = (2, 5, 10)
+_TRENDS = ("very_fast_down", "fast_down", "down", "no_change", "up", "fast_up", "very_fast_up")
+
+# Trends assigned at random to generated historical readings
+_HISTORICAL_TRENDS = ("no_change", "up", "down", "fast_up", "fast_down")
+
+# Retry delay after a duplicate reading (the sensor has not updated yet)
+_DUPLICATE_RETRY_DELAY = timedelta(seconds=20)
+
+# Hourly-cycle variation for each 5-minute history slot, newest first (24 hours)
+_HISTORY_VARIATION = 20 * (1 + 0.5 * np.sin(np.arange(24 * 12) * 5 / 60.0))
+
+# Draws generated per refill of the live-reading noise buffers
+_GAUSS_BUFFER_SIZE = 4096
+_UNIFORM_BUFFER_SIZE = 4096
+
+# Extra per-reading drift (low, high in mg/dL) while following a trend
+_TREND_DRIFT = {
+    "very_fast_up": (8, 15),
+    "fast_up": (4, 8),
+    "up": (1, 4),
+    "down": (-4, -1),
+    "fast_down": (-8, -4),
+    "very_fast_down": (-15, -8)
+}
+
+@functools.lru_cache(maxsize=1)
+def _scenarios_for_hour(hour_start: datetime) -> dict:
+    """Scenario data shared by all clients created within the same hour
+    
+    Readings start two hours before the start of the current hour, not two
+    hours before now, so scenario timestamps can be up to 59 minutes older
+    than when each client generated its own scenarios.
+    """
+    # Fixed seed: values are identical across instances and runs, only the
+    # timestamps move with the hour
+    return MockDexcomClient._generate_test_scenarios(
+        np.random.default_rng(42), hour_start - timedelta(hours=2)
+    )
+
 class MockDexcomClient:
     """Mock Dexcom client for testing purposes"""
     
+    # Trend names indexed by get_recent_readings_arrays() trend indexes
+    TREND_VOCAB = _HISTORICAL_TRENDS
+    
+    __slots__ = (
+        'settings', 'last_reading_time', 'last_reading_value', 'current_value',
+        'trend_direction', 'reading_count',
+        '_next_expected_reading_time', '_next_reading_deadline',
+        'scenario_readings', 'current_scenario', '_scenario_data', '_scenario_len', '_rng', '_gauss_buf', '_uniform_buf',
+        '_now', '_reading_interval'
+    )
+    
     def __init__(self, settings: Settings):
         self.settings = settings
+        # Bound once for the per-reading hot paths
+        self._now = datetime.now
+        self._reading_interval = timedelta(seconds=settings.sensor_reading_interval_seconds)
         self.last_reading_time = None
         self.last_reading_value = None
         self.current_value = 120.0  # Starting glucose value
@@ -20,37 +81,58 @@ class MockDexcomClient:
         self.reading_count = 0
         self.next_expected_reading_time = None  # When next reading should be available (timestamp + 305s)
         
-        # Simulate various scenarios for testing
-        self.scenario_readings = self._generate_test_scenarios()
+        # Simulate various scenarios for testing (shared, read-only)
+        self.scenario_readings = _scenarios_for_hour(
+            datetime.now().replace(minute=0, second=0, microsecond=0)
+        )
         self.current_scenario = "normal"
+        self._select_scenario_data()
+        
+        # Noise source; live readings draw from a pre-generated buffer
+        self._rng = np.random.default_rng()
+        self._gauss_buf = deque()
+        self._uniform_buf = deque()
         
         logger.info("Mock Dexcom client initialized for testing")
     
-    def _generate_test_scenarios(self) -> dict:
+    @property
+    def next_expected_reading_time(self) -> Optional[datetime]:
+        """Wall-clock time the next reading should be available (for display)"""
+        return self._next_expected_reading_time
+    
+    @next_expected_reading_time.setter
+    def next_expected_reading_time(self, value: Optional[datetime]):
+        # Scheduling checks compare against a monotonic deadline computed here once
+        self._next_expected_reading_time = value
+        if value is None:
+            self._next_reading_deadline = None
+        else:
+            self._next_reading_deadline = time.monotonic() + (value - self._now()).total_seconds()
+    
+    @staticmethod
+    def _generate_test_scenarios(rng: np.random.Generator, base_time: datetime) -> dict:
         """Generate different test scenarios"""
-        base_time = datetime.now() - timedelta(hours=2)
+        steps = np.arange(24)
+        # Five-minute grid starting at base_time, computed in epoch seconds
+        epochs = base_time.timestamp() + steps * 300
+        timestamps = [datetime.fromtimestamp(epoch) for epoch in epochs.tolist()]
+        
+        def build(values: np.ndarray, trends) -> tuple:
+            # Tuples, since every instance shares the same scenario data
+            return tuple(zip(timestamps, values.tolist(), trends))
         
         scenarios = {
-            "normal": [
-                (base_time + timedelta(minutes=i*5), 100 + random.gauss(0, 10), "no_change")
-                for i in range(24)
-            ],
-            "rapid_rise": [
-                (base_time + timedelta(minutes=i*5), 80 + i*8, "fast_up" if i < 10 else "very_fast_up")
-                for i in range(20)
-            ],
-            "rapid_fall": [
-                (base_time + timedelta(minutes=i*5), 180 - i*8, "fast_down" if i < 10 else "very_fast_down")
-                for i in range(20)
-            ],
-            "low_trending": [
-                (base_time + timedelta(minutes=i*5), 85 - i*2, "down")
-                for i in range(15)
-            ],
-            "high_stable": [
-                (base_time + timedelta(minutes=i*5), 200 + random.gauss(0, 5), "no_change")
-                for i in range(12)
-            ]
+            "normal": build(100 + rng.normal(0, 10, 24), ["no_change"] * 24),
+            "rapid_rise": build(
+                80 + steps[:20] * 8,
+                ["fast_up"] * 10 + ["very_fast_up"] * 10
+            ),
+            "rapid_fall": build(
+                180 - steps[:20] * 8,
+                ["fast_down"] * 10 + ["very_fast_down"] * 10
+            ),
+            "low_trending": build(85 - steps[:15] * 2, ["down"] * 15),
+            "high_stable": build(200 + rng.normal(0, 5, 12), ["no_change"] * 12)
         }
         
         return scenarios
@@ -60,82 +142,83 @@ class MockDexcomClient:
         if scenario in self.scenario_readings:
             self.current_scenario = scenario
             self.reading_count = 0
-            logger.info(f"Switched to test scenario: {scenario}")
+            self._select_scenario_data()
+            logger.info("Switched to test scenario: %s", scenario)
         else:
-            logger.warning(f"Unknown scenario: {scenario}")
+            logger.warning("Unknown scenario: %s", scenario)
+    
+    def _select_scenario_data(self):
+        """Cache the active scenario's readings and length for get_current_reading"""
+        self._scenario_data = self.scenario_readings.get(self.current_scenario, ())
+        self._scenario_len = len(self._scenario_data)
     
     def get_current_reading(self) -> Optional[GlucoseReading]:
         """Simulate getting current glucose reading"""
         try:
+            now = self._now()
+            
             # Use scenario data if available
-            if (self.current_scenario in self.scenario_readings and 
-                self.reading_count < len(self.scenario_readings[self.current_scenario])):
-                
-                timestamp, value, trend = self.scenario_readings[self.current_scenario][self.reading_count]
+            if self.reading_count < self._scenario_len:
+                timestamp, value, trend = self._scenario_data[self.reading_count]
                 self.reading_count += 1
                 
             else:
                 # Generate realistic random data
-                timestamp = datetime.now()
+                timestamp = now
                 value = self._generate_realistic_value()
                 trend = self._determine_trend(value)
             
-            reading = GlucoseReading(
-                timestamp=timestamp,
-                value=value,
-                trend=trend,
-                unit="mg/dL"
-            )
-            
             # Check if this is the same reading we already processed
-            if (self.last_reading_time == reading.timestamp and 
+            if (self.last_reading_time == timestamp and 
                 self.last_reading_value == value):
                 logger.info("Same mock reading already retrieved, will retry in 20 seconds")
                 # For duplicate readings, wait only 20 seconds before retrying
                 # instead of the full interval (sensor hasn't updated yet)
-                self.next_expected_reading_time = datetime.now() + timedelta(seconds=20)
+                self.next_expected_reading_time = now + _DUPLICATE_RETRY_DELAY
                 return None
             
+            reading = GlucoseReading(
+                timestamp=timestamp,
+                value=value,
+                trend=trend,
+                unit="mg/dL"
+            )
+            
             self.last_reading_time = reading.timestamp
             self.last_reading_value = value
             self.current_value = value
             
             # Calculate next expected reading time: timestamp + configured interval
-            self.next_expected_reading_time = reading.timestamp + timedelta(seconds=self.settings.sensor_reading_interval_seconds)
-            logger.info(f"Mock: Next reading expected at: {self.next_expected_reading_time.strftime('%H:%M:%S')} (timestamp + {self.settings.sensor_reading_interval_seconds}s)")
+            self.next_expected_reading_time = reading.timestamp + self._reading_interval
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Mock: Next reading expected at: %s (timestamp + %ss)",
+                            self.next_expected_reading_time.strftime('%H:%M:%S'),
+                            self.settings.sensor_reading_interval_seconds)
             
-            logger.info(f"Mock reading: {reading.value} {reading.unit}, trend: {reading.trend}")
+            logger.info("Mock reading: %s %s, trend: %s", reading.value, reading.unit, reading.trend)
             return reading
             
         except Exception as e:
-            logger.error(f"Error generating mock reading: {e}")
+            logger.error("Error generating mock reading: %s", e)
             return None
     
     def _generate_realistic_value(self) -> float:
         """Generate realistic glucose values with some variation"""
         # Add some randomness but keep within reasonable bounds
-        change = random.gauss(0, 5)  # Small random changes
+        change = self._next_gauss() * 5  # Small random changes
         
         # Apply trend-based changes
-        if self.trend_direction == "very_fast_up":
-            change += random.uniform(8, 15)
-        elif self.trend_direction == "fast_up":
-            change += random.uniform(4, 8)
-        elif self.trend_direction == "up":
-            change += random.uniform(1, 4)
-        elif self.trend_direction == "down":
-            change -= random.uniform(1, 4)
-        elif self.trend_direction == "fast_down":
-            change -= random.uniform(4, 8)
-        elif self.trend_direction == "very_fast_down":
-            change -= random.uniform(8, 15)
+        drift = _TREND_DRIFT.get(self.trend_direction)
+        if drift is not None:
+            low, high = drift
+            change += low + (high - low) * self._next_uniform()
         
         new_value = self.current_value + change
         
-        # Keep within realistic bounds
-        new_value = max(40, min(400, new_value))
+        # Round to tenths of mg/dL with integer math, keeping within realistic bounds
+        tenths = max(400, min(4000, int(new_value * 10 + 0.5)))
         
-        return round(new_value, 1)
+        return tenths / 10.0
     
     def _determine_trend(self, current_value: float) -> str:
         """Determine trend based on current and previous values"""
@@ -143,91 +226,88 @@ class MockDexcomClient:
             return "no_change"
         
         diff = current_value - self.current_value
+        index = (bisect.bisect_right(_FALLING_THRESHOLDS, diff) +
+                 bisect.bisect_left(_RISING_THRESHOLDS, diff))
+        self.trend_direction = _TRENDS[index]
         
-        if diff > 10:
-            self.trend_direction = "very_fast_up"
-        elif diff > 5:
-            self.trend_direction = "fast_up"
-        elif diff > 2:
-            self.trend_direction = "up"
-        elif diff < -10:
-            self.trend_direction = "very_fast_down"
-        elif diff < -5:
-            self.trend_direction = "fast_down"
-        elif diff < -2:
-            self.trend_direction = "down"
+        return self.trend_direction
+    
+    def _next_gauss(self) -> float:
+        """Return the next standard normal draw, refilling the buffer in one batch"""
+        if not self._gauss_buf:
+            self._gauss_buf.extend(self._rng.standard_normal(_GAUSS_BUFFER_SIZE).tolist())
+        return self._gauss_buf.popleft()
+    
+    def _next_uniform(self) -> float:
+        """Return the next uniform [0, 1) draw, refilling the buffer in one batch"""
+        if not self._uniform_buf:
+            self._uniform_buf.extend(self._rng.random(_UNIFORM_BUFFER_SIZE).tolist())
+        return self._uniform_buf.popleft()
+    
+    def get_recent_readings_arrays(self, hours: int = 3) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Simulate recent readings as parallel (timestamps, values, trend indexes) arrays"""
+        count = hours * 12  # Every 5 minutes
+        
+        # Oldest reading first; values follow an hourly cycle plus noise
+        minutes_ago = np.arange(count - 1, -1, -1) * 5
+        timestamps = np.datetime64(self._now(), 'us') - minutes_ago.astype('timedelta64[m]')
+        if count <= len(_HISTORY_VARIATION):
+            variation = _HISTORY_VARIATION[count - 1::-1] if count else _HISTORY_VARIATION[:0]
         else:
-            self.trend_direction = "no_change"
+            variation = 20 * (1 + 0.5 * np.sin(minutes_ago / 60.0))
+        values = np.clip(np.round(120 + variation + self._rng.normal(0, 8, count), 1), 50, 300)
+        trend_indexes = self._rng.integers(0, len(self.TREND_VOCAB), count, dtype=np.uint8)
         
-        return self.trend_direction
+        return timestamps, values, trend_indexes
     
     def get_recent_readings(self, hours: int = 3) -> List[GlucoseReading]:
         """Simulate getting recent glucose readings"""
-        readings = []
-        current_time = datetime.now()
-        
-        # Generate readings for the past few hours
-        for i in range(hours * 12):  # Every 5 minutes
-            timestamp = current_time - timedelta(minutes=i*5)
-            value = self._generate_historical_value(i)
-            trend = self._generate_historical_trend(i)
-            
-            reading = GlucoseReading(
+        timestamps, values, trend_indexes = self.get_recent_readings_arrays(hours)
+        trend_vocab = self.TREND_VOCAB
+        
+        readings = [
+            GlucoseReading(
                 timestamp=timestamp,
                 value=value,
-                trend=trend,
+                trend=trend_vocab[trend_index],
                 unit="mg/dL"
             )
-            readings.append(reading)
+            for timestamp, value, trend_index in zip(timestamps.tolist(), values.tolist(),
+                                                     trend_indexes.tolist())
+        ]
         
-        readings.reverse()  # Chronological order
-        logger.info(f"Generated {len(readings)} mock historical readings")
+        logger.info("Generated %d mock historical readings", len(readings))
         return readings
     
-    def _generate_historical_value(self, minutes_ago: int) -> float:
-        """Generate historical glucose value"""
-        base_value = 120
-        # Add some realistic variation over time
-        time_factor = minutes_ago * 5  # Convert to minutes
-        variation = 20 * (1 + 0.5 * math.sin(time_factor / 60.0))  # Hourly cycles
-        noise = random.gauss(0, 8)
-        
-        value = base_value + variation + noise
-        return max(50, min(300, round(value, 1)))
-    
-    def _generate_historical_trend(self, minutes_ago: int) -> str:
-        """Generate historical trend"""
-        trends = ["no_change", "up", "down", "fast_up", "fast_down"]
-        return random.choice(trends)
-    
     def is_new_reading_available(self) -> bool:
         """Check if a new reading should be available"""
         # Always allow first reading
-        if self.next_expected_reading_time is None:
+        if self._next_reading_deadline is None:
             return True
         
         # Check if we've reached the expected next reading time
-        now = datetime.now()
-        if now >= self.next_expected_reading_time:
-            logger.info(f"Mock: Expected reading time reached ({self.next_expected_reading_time.strftime('%H:%M:%S')})")
+        time_until_next = self._next_reading_deadline - time.monotonic()
+        if time_until_next <= 0:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Mock: Expected reading time reached (%s)",
+                            self.next_expected_reading_time.strftime('%H:%M:%S'))
             return True
         
-        time_until_next = (self.next_expected_reading_time - now).total_seconds()
-        logger.info(f"Mock: Next reading not due for {time_until_next:.0f} seconds")
+        logger.info("Mock: Next reading not due for %.0f seconds", time_until_next)
         return False
     
     def wait_for_next_reading(self) -> float:
         """Return wait time for next reading based on timestamp + 305s"""
         # If no expected time set, don't wait
-        if self.next_expected_reading_time is None:
+        if self._next_reading_deadline is None:
             return 0.0
         
-        now = datetime.now()
-        if now >= self.next_expected_reading_time:
+        wait_seconds = self._next_reading_deadline - time.monotonic()
+        if wait_seconds <= 0:
             return 0.0
         
-        wait_seconds = (self.next_expected_reading_time - now).total_seconds()
-        logger.info(f"Mock: Waiting {wait_seconds:.0f} seconds for next reading (based on sensor timestamp + {self.settings.sensor_reading_interval_seconds}s)")
+        logger.info("Mock: Waiting %.0f seconds for next reading (based on sensor timestamp + %ss)",
+                    wait_seconds, self.settings.sensor_reading_interval_seconds)
         return wait_seconds
     
     
@@ -239,4 +319,4 @@ class MockDexcomClient:
     def test_connection(self) -> bool:
         """Always succeed for testing"""
         logger.info("Mock connection test successful")
-        return True
\ No newline at end of file
+        return True
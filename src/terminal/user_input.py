@@ -1,12 +1,15 @@
 import logging
+import os
+import signal
 import threading
 import sys
 import time
 from datetime import datetime, timedelta
-from typing import Optional, Callable, Dict
+from types import MappingProxyType
+from typing import Optional, Callable, Dict, Tuple
 
 try:
-    import select
+    import selectors
     HAS_SELECT = True
 except ImportError:
     HAS_SELECT = False
@@ -17,39 +20,61 @@ from ..commands.formatters import TerminalFormatter
 
 logger = logging.getLogger(__name__)
 
+_PROMPT = "\nEnter command (h for help): "
+
+_QUICK_HELP = "\n".join([
+    "\nInteractive Terminal Ready!",
+    "   Type 'i 2.5' to log insulin",
+    "   Type 'c 30' to log carbs",
+    "   Type 'reading' for latest glucose",
+    "   Type 's' for status",
+    "   Type 'h' for full help"
+])
+
 class UserInputHandler:
     """Handles interactive terminal input for logging insulin and carbs"""
     
+    __slots__ = ('db', 'settings', 'running', 'input_thread', 'callbacks',
+                 'command_processor', 'formatter', '_wakeup_r', '_wakeup_w')
+    
+    # Command word -> handler method name, shared by all instances
+    _COMMAND_NAMES = MappingProxyType({
+        'insulin': '_handle_insulin_command',
+        'i': '_handle_insulin_command',
+        'carbs': '_handle_carbs_command',
+        'c': '_handle_carbs_command',
+        'iob': '_handle_iob_override_command',
+        'setiob': '_handle_iob_override_command',
+        'status': '_handle_status_command',
+        's': '_handle_status_command',
+        'help': '_handle_help_command',
+        'h': '_handle_help_command',
+        'history': '_handle_history_command',
+        'reading': '_handle_reading_command',
+        'next': '_handle_next_reading_command',
+        'n': '_handle_next_reading_command',
+        'quit': '_handle_quit_command',
+        'q': '_handle_quit_command'
+    })
+    
+    # Handlers taking <amount> [type] [notes...]; the notes are kept as typed
+    _NOTES_HANDLERS = frozenset({
+        '_handle_insulin_command', '_handle_carbs_command', '_handle_iob_override_command'
+    })
+    
     def __init__(self, db: GlucoseDatabase, settings: Settings):
         self.db = db
         self.settings = settings
         self.running = False
         self.input_thread = None
         self.callbacks = {}
+        # Self-pipe that wakes the input loop's selector on stop()
+        self._wakeup_r = None
+        self._wakeup_w = None
         
         # Initialize command processor and formatter
         self.command_processor = CommandProcessor(db, settings)
         self.formatter = TerminalFormatter(settings)
-        
-        # Command mapping
-        self.commands = {
-            'insulin': self._handle_insulin_command,
-            'i': self._handle_insulin_command,
-            'carbs': self._handle_carbs_command,
-            'c': self._handle_carbs_command,
-            'iob': self._handle_iob_override_command,
-            'setiob': self._handle_iob_override_command,
-            'status': self._handle_status_command,
-            's': self._handle_status_command,
-            'help': self._handle_help_command,
-            'h': self._handle_help_command,
-            'history': self._handle_history_command,
-            'reading': self._handle_reading_command,
-            'next': self._handle_next_reading_command,
-            'n': self._handle_next_reading_command,
-            'quit': self._handle_quit_command,
-            'q': self._handle_quit_command
-        }
     
     def start(self):
         """Start the input handler in a separate thread"""
@@ -57,6 +82,8 @@ class UserInputHandler:
             return
         
         self.running = True
+        if HAS_SELECT:
+            self._wakeup_r, self._wakeup_w = os.pipe()
         self.input_thread = threading.Thread(target=self._input_loop, daemon=True)
         self.input_thread.start()
         logger.info("User input handler started")
@@ -68,80 +95,149 @@ class UserInputHandler:
         """Stop the input handler"""
         self.running = False
         if self.input_thread and self.input_thread.is_alive():
-            print("\nShutting down... (press Enter to speed up)")
+            if self._wakeup_w is not None:
+                os.write(self._wakeup_w, b'\0')
+            else:
+                print("\nShutting down... (press Enter to speed up)")
             self.input_thread.join(timeout=2.0)
             if self.input_thread.is_alive():
                 logger.warning("User input thread did not shut down cleanly")
+        self._close_wakeup_pipe()
         logger.info("User input handler stopped")
     
+    def _close_wakeup_pipe(self):
+        """Close the stop() wakeup pipe, if one was opened"""
+        for fd in (self._wakeup_r, self._wakeup_w):
+            if fd is not None:
+                os.close(fd)
+        self._wakeup_r = None
+        self._wakeup_w = None
+    
     def register_callback(self, event: str, callback: Callable):
         """Register callback for events (e.g., 'insulin_logged', 'carbs_logged')"""
         self.callbacks[event] = callback
         # Also register with command processor
         self.command_processor.register_callback(event, callback)
     
+    def _show_prompt(self):
+        """Write the command prompt without going through input()"""
+        sys.stdout.write(_PROMPT)
+        sys.stdout.flush()
+    
+    def _read_command_line(self) -> str:
+        """Read one line from stdin, raising EOFError at end of input"""
+        line = sys.stdin.readline()
+        if not line:
+            raise EOFError
+        return line.strip()
+    
+    def _open_input_selector(self):
+        """Return a selector watching stdin and the wakeup pipe, or None if stdin can't be watched"""
+        if not HAS_SELECT:
+            return None
+        
+        selector = selectors.DefaultSelector()
+        try:
+            selector.register(sys.stdin, selectors.EVENT_READ)
+        except (OSError, ValueError):
+            # stdin has no usable file descriptor (e.g. redirected to a stream)
+            selector.close()
+            return None
+        if self._wakeup_r is not None:
+            selector.register(self._wakeup_r, selectors.EVENT_READ)
+        return selector
+    
     def _input_loop(self):
         """Main input loop running in separate thread"""
         prompt_shown = False
+        selector = self._open_input_selector()
+        # Without a wakeup pipe, poll self.running every 0.5 seconds
+        timeout = None if self._wakeup_r is not None else 0.5
         
-        while self.running:
-            try:
-                if HAS_SELECT and hasattr(sys.stdin, 'fileno'):
-                    # Use non-blocking input with select (Unix/Linux/macOS)
-                    if not prompt_shown:
-                        print("\nEnter command (h for help): ", end='', flush=True)
-                        prompt_shown = True
-                    
-                    # Wait for input with 0.5 second timeout
-                    if sys.stdin in select.select([sys.stdin], [], [], 0.5)[0]:
-                        command_line = input().strip()
-                        prompt_shown = False  # Reset so prompt shows again after command
-                        
-                        if not command_line:
-                            continue
+        try:
+            while self.running:
+                try:
+                    if selector is not None:
+                        # Event-driven input (Unix/Linux/macOS): epoll/kqueue where available
+                        if not prompt_shown:
+                            self._show_prompt()
+                            prompt_shown = True
                         
-                        self._process_command(command_line)
-                    # If no input available, loop continues and checks self.running
-                else:
-                    # Fallback - blocking input but with better shutdown message
-                    if not prompt_shown:
-                        print("\nEnter command (h for help): ", end='', flush=True)
-                        prompt_shown = True
-                    
-                    try:
-                        command_line = input().strip()
-                        prompt_shown = False  # Reset so prompt shows again after command
+                        # Block until input arrives or stop() writes to the wakeup pipe
+                        ready = [key.fileobj for key, _ in selector.select(timeout)]
+                        if self._wakeup_r is not None and self._wakeup_r in ready:
+                            break
                         
-                        if not command_line:
-                            continue
+                        if sys.stdin in ready:
+                            command_line = self._read_command_line()
+                            prompt_shown = False  # Reset so prompt shows again after command
+                            
+                            if not command_line:
+                                continue
+                            
+                            self._process_command(command_line)
+                        # If no input available, loop continues and checks self.running
+                    else:
+                        # Fallback - blocking input but with better shutdown message
+                        if not prompt_shown:
+                            self._show_prompt()
+                            prompt_shown = True
                         
-                        self._process_command(command_line)
-                    except (EOFError, KeyboardInterrupt):
-                        break
-                
-            except (EOFError, KeyboardInterrupt):
-                # Handle Ctrl+C or Ctrl+D gracefully
-                break
-            except Exception as e:
-                logger.error(f"Error in input loop: {e}")
-                print(f"Error processing command: {e}")
+                        try:
+                            command_line = self._read_command_line()
+                            prompt_shown = False  # Reset so prompt shows again after command
+                            
+                            if not command_line:
+                                continue
+                            
+                            self._process_command(command_line)
+                        except (EOFError, KeyboardInterrupt):
+                            break
+                    
+                except (EOFError, KeyboardInterrupt):
+                    # Handle Ctrl+C or Ctrl+D gracefully
+                    break
+                except Exception as e:
+                    logger.error(f"Error in input loop: {e}")
+                    print(f"Error processing command: {e}")
+        finally:
+            if selector is not None:
+                selector.close()
     
     def _process_command(self, command_line: str):
         """Process a command line"""
-        parts = command_line.split()
+        # Split off the command word only; arguments are tokenized once a
+        # handler is found (most commands take none)
+        parts = command_line.split(None, 1)
         if not parts:
             return
         
         command = parts[0].lower()
-        args = parts[1:]
+        handler_name = self._COMMAND_NAMES.get(command)
+        if handler_name is None:
+            print(f"Unknown command: {command}. Type 'h' or 'help' for available commands.")
+            return
         
-        if command in self.commands:
-            try:
-                self.commands[command](args)
-            except Exception as e:
-                print(f"Error executing command: {e}")
+        handler = getattr(self, handler_name)
+        if len(parts) == 1:
+            args = []
+        elif handler_name in self._NOTES_HANDLERS:
+            # Free-text notes stay in one piece as the third argument
+            args = parts[1].split(None, 2)
         else:
-            print(f"Unknown command: {command}. Type 'h' or 'help' for available commands.")
+            args = parts[1].split()
+        try:
+            handler(args)
+        except Exception as e:
+            print(f"Error executing command: {e}")
+    
+    @staticmethod
+    def _parse_amount_args(args, default_kind: str) -> Tuple[float, str, Optional[str]]:
+        """Split <amount> [type] [notes] arguments; raises ValueError for a bad amount"""
+        amount = float(args[0])
+        kind = args[1] if len(args) > 1 else default_kind
+        notes = args[2] if len(args) > 2 else None
+        return amount, kind, notes
     
     def _handle_insulin_command(self, args):
         """Handle insulin logging command"""
@@ -154,10 +250,7 @@ class UserInputHandler:
             return
         
         try:
-            units = float(args[0])
-            insulin_type = args[1] if len(args) > 1 else 'rapid'
-            notes = ' '.join(args[2:]) if len(args) > 2 else None
-            
+            units, insulin_type, notes = self._parse_amount_args(args, 'rapid')
             result = self.command_processor.execute_insulin(units, insulin_type, notes)
             print(self.formatter.format_insulin_result(result))
             
@@ -177,10 +270,7 @@ class UserInputHandler:
             return
         
         try:
-            grams = float(args[0])
-            carb_type = args[1] if len(args) > 1 else 'mixed'
-            notes = ' '.join(args[2:]) if len(args) > 2 else None
-            
+            grams, carb_type, notes = self._parse_amount_args(args, 'mixed')
             result = self.command_processor.execute_carbs(grams, carb_type, notes)
             print(self.formatter.format_carbs_result(result))
                 
@@ -200,10 +290,7 @@ class UserInputHandler:
             return
         
         try:
-            iob_value = float(args[0])
-            source = args[1] if len(args) > 1 else 'manual'
-            notes = ' '.join(args[2:]) if len(args) > 2 else None
-            
+            iob_value, source, notes = self._parse_amount_args(args, 'manual')
             result = self.command_processor.execute_iob_override(iob_value, source, notes)
             print(self.formatter.format_iob_override_result(result))
             
@@ -264,21 +351,16 @@ class UserInputHandler:
     
     def _show_quick_help(self):
         """Show quick help message"""
-        print("\nInteractive Terminal Ready!")
-        print("   Type 'i 2.5' to log insulin")
-        print("   Type 'c 30' to log carbs")
-        print("   Type 'reading' for latest glucose")
-        print("   Type 's' for status")
-        print("   Type 'h' for full help")
+        print(_QUICK_HELP)
     
     def _handle_quit_command(self, args):
         """Handle quit command"""
         print("Exiting glucose monitor...")
         self.running = False
         # Signal main application to quit
-        if 'quit_requested' in self.callbacks:
-            self.callbacks['quit_requested']()
+        quit_requested = self.callbacks.get('quit_requested')
+        if quit_requested:
+            quit_requested()
         else:
             # Fallback - raise KeyboardInterrupt
-            import os
-            os.kill(os.getpid(), 2)  # Send SIGINT
\ No newline at end of file
+            os.kill(os.getpid(), signal.SIGINT)
\ No newline at end of file
@@ -1,21 +1,43 @@
+import functools
 import logging
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.patches import Rectangle
 import numpy as np
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Dict, Tuple
 from ..database import GlucoseReading
 from ..config import Settings
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1)
+def _apply_plot_style():
+    """Load the plot stylesheet once per process rather than per grapher"""
+    plt.style.use('seaborn-v0_8')  # Use a clean style
+
 class GlucoseGrapher:
     """Creates graphs and visualizations for glucose data"""
     
     def __init__(self, settings: Settings):
         self.settings = settings
-        plt.style.use('seaborn-v0_8')  # Use a clean style
+        _apply_plot_style()
+        
+        # Glucose bands shaded behind every plot: (low, high, color, label)
+        self._target_bands = (
+            (settings.low_glucose_threshold, settings.high_glucose_threshold,
+             'green', 'Target Range'),  # 70-180 mg/dL
+            (settings.critical_low_threshold, settings.low_glucose_threshold,
+             'yellow', 'Low'),  # 55-70 mg/dL
+            (0, settings.critical_low_threshold, 'red', 'Critical Low'),  # <55 mg/dL
+            (settings.high_glucose_threshold, settings.critical_high_threshold,
+             'orange', 'High'),  # 180-300 mg/dL
+            (settings.critical_high_threshold, 500, 'red', 'Critical High')  # >300 mg/dL
+        )
+        # Timeline figure kept for reuse while it is still open
+        self._timeline_fig = None
+        self._timeline_ax = None
         
     def create_glucose_timeline(self, readings: List[GlucoseReading], 
                               prediction: Optional[Dict] = None,
@@ -25,15 +47,11 @@ class GlucoseGrapher:
             logger.warning("Not enough readings to create graph")
             return None
         
-        # Sort readings by timestamp
-        sorted_readings = sorted(readings, key=lambda r: r.timestamp)
+        # Extract data, sorted by timestamp
+        timestamps, values = self._to_arrays(readings)
         
-        # Extract data
-        timestamps = [r.timestamp for r in sorted_readings]
-        values = [r.value for r in sorted_readings]
-        
-        # Create figure and axis
-        fig, ax = plt.subplots(figsize=(12, 8))
+        # Reuse the timeline figure if it is still open, else create it
+        fig, ax = self._get_timeline_axes()
         
         # Plot glucose line
         ax.plot(timestamps, values, 'b-', linewidth=2, marker='o', 
@@ -44,23 +62,36 @@ class GlucoseGrapher:
         
         # Add prediction if available
         if prediction and prediction.get('predicted_value'):
-            self._add_prediction(ax, timestamps[-1], prediction)
+            self._add_prediction(ax, timestamps[-1].item(), prediction)
         
         # Customize the plot
         self._customize_plot(ax, "Glucose Timeline")
         
         # Add trend annotations
-        self._add_trend_annotations(ax, sorted_readings)
+        self._add_trend_annotations(ax, timestamps, values)
         
         # Save or display
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
             logger.info(f"Graph saved to {save_path}")
             return save_path
         else:
+            fig.canvas.draw_idle()
             plt.show()
             return "displayed"
     
+    def _get_timeline_axes(self):
+        """Return a cleared timeline figure and axis, creating them if needed"""
+        fig = self._timeline_fig
+        if fig is not None and plt.fignum_exists(fig.number):
+            self._timeline_ax.clear()
+            return fig, self._timeline_ax
+        
+        fig, ax = plt.subplots(figsize=(12, 8))
+        self._timeline_fig = fig
+        self._timeline_ax = ax
+        return fig, ax
+    
     def create_trend_analysis_graph(self, readings: List[GlucoseReading],
                                   trend_analysis: Dict,
                                   save_path: Optional[str] = None) -> str:
@@ -68,9 +99,7 @@ class GlucoseGrapher:
         if len(readings) < 3:
             return None
         
-        sorted_readings = sorted(readings, key=lambda r: r.timestamp)
-        timestamps = [r.timestamp for r in sorted_readings]
-        values = [r.value for r in sorted_readings]
+        timestamps, values = self._to_arrays(readings)
         
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10), 
                                       height_ratios=[3, 1], sharex=True)
@@ -91,10 +120,10 @@ class GlucoseGrapher:
         
         # Rate of change plot
         if len(readings) > 1:
-            rates = self._calculate_rates_of_change(sorted_readings)
+            rates = self._calculate_rates_of_change(timestamps, values)
             rate_times = timestamps[1:]  # One fewer rate than readings
             
-            ax2.bar(rate_times, rates, width=timedelta(minutes=2), 
+            ax2.bar(rate_times, rates, width=np.timedelta64(2, 'm'), 
                    alpha=0.7, color='green')
             ax2.axhline(y=0, color='black', linestyle='-', alpha=0.3)
             ax2.set_ylabel('Rate of Change\n(mg/dL/min)')
@@ -127,31 +156,36 @@ class GlucoseGrapher:
         if len(daily_data) < 1:
             return None
         
+        # All days back to back in time order, with each day's start offset
+        timestamps, values = self._to_arrays(readings)
+        counts = np.fromiter((len(day) for day in daily_data.values()),
+                             dtype=np.intp, count=len(daily_data))
+        starts = np.cumsum(counts) - counts
+        
+        # Calculate daily statistics for every day at once
+        means, mins, maxs = self._daily_statistics(values, starts, counts)
+        
         fig, axes = plt.subplots(len(daily_data), 1, 
                                figsize=(12, 4 * len(daily_data)),
                                squeeze=False)
         
-        for idx, (date_str, day_readings) in enumerate(daily_data.items()):
+        for idx, date_str in enumerate(daily_data):
             ax = axes[idx, 0]
             
-            timestamps = [r.timestamp for r in day_readings]
-            values = [r.value for r in day_readings]
+            start, end = starts[idx], starts[idx] + counts[idx]
+            day_timestamps = timestamps[start:end]
             
             # Plot glucose line
-            ax.plot(timestamps, values, 'b-', linewidth=2, marker='o', 
+            ax.plot(day_timestamps, values[start:end], 'b-', linewidth=2, marker='o', 
                    markersize=3, alpha=0.8)
             
-            # Add target ranges
-            self._add_target_ranges(ax, timestamps[0], timestamps[-1])
-            
-            # Calculate daily statistics
-            avg_glucose = np.mean(values)
-            min_glucose = np.min(values)
-            max_glucose = np.max(values)
+            # Add target ranges (legend labels only once per figure)
+            self._add_target_ranges(ax, day_timestamps[0], day_timestamps[-1],
+                                    with_labels=idx == 0)
             
             # Set title with statistics
-            ax.set_title(f"{date_str} - Avg: {avg_glucose:.0f}, "
-                        f"Range: {min_glucose:.0f}-{max_glucose:.0f} mg/dL")
+            ax.set_title(f"{date_str} - Avg: {means[idx]:.0f}, "
+                        f"Range: {mins[idx]:.0f}-{maxs[idx]:.0f} mg/dL")
             
             # Customize axis
             ax.set_ylabel('Glucose (mg/dL)')
@@ -171,30 +205,20 @@ class GlucoseGrapher:
             plt.show()
             return "displayed"
     
-    def _add_target_ranges(self, ax, start_time: datetime, end_time: datetime):
+    def _daily_statistics(self, values: np.ndarray, starts: np.ndarray,
+                          counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per-day (mean, min, max) of back-to-back daily value runs"""
+        means = np.add.reduceat(values, starts) / counts
+        mins = np.minimum.reduceat(values, starts)
+        maxs = np.maximum.reduceat(values, starts)
+        return means, mins, maxs
+    
+    def _add_target_ranges(self, ax, start_time: datetime, end_time: datetime,
+                           with_labels: bool = True):
         """Add colored target ranges to the plot"""
-        # Target range (70-180 mg/dL)
-        ax.axhspan(self.settings.low_glucose_threshold, 
-                  self.settings.high_glucose_threshold,
-                  alpha=0.2, color='green', label='Target Range')
-        
-        # Low range (55-70 mg/dL)
-        ax.axhspan(self.settings.critical_low_threshold,
-                  self.settings.low_glucose_threshold,
-                  alpha=0.2, color='yellow', label='Low')
-        
-        # Critical low (<55 mg/dL)
-        ax.axhspan(0, self.settings.critical_low_threshold,
-                  alpha=0.2, color='red', label='Critical Low')
-        
-        # High range (180-300 mg/dL)
-        ax.axhspan(self.settings.high_glucose_threshold,
-                  self.settings.critical_high_threshold,
-                  alpha=0.2, color='orange', label='High')
-        
-        # Critical high (>300 mg/dL)
-        ax.axhspan(self.settings.critical_high_threshold, 500,
-                  alpha=0.2, color='red', label='Critical High')
+        for low, high, color, label in self._target_bands:
+            ax.axhspan(low, high, alpha=0.2, color=color,
+                       label=label if with_labels else '_nolegend_')
     
     def _add_prediction(self, ax, last_timestamp: datetime, prediction: Dict):
         """Add prediction to the plot"""
@@ -219,16 +243,16 @@ class GlucoseGrapher:
                    bbox=dict(boxstyle='round,pad=0.3', facecolor='yellow', alpha=0.7),
                    arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'))
     
-    def _add_trend_line(self, ax, timestamps: List[datetime], 
-                       values: List[float], trend_analysis: Dict):
+    def _add_trend_line(self, ax, timestamps: np.ndarray, 
+                       values: np.ndarray, trend_analysis: Dict):
         """Add trend line to the plot"""
         if len(timestamps) < 2:
             return
         
         # Calculate trend line
         rate = trend_analysis['rate_of_change']  # mg/dL per minute
-        last_time = timestamps[-1]
-        last_value = values[-1]
+        last_time = timestamps[-1].item()
+        last_value = float(values[-1])
         
         # Extend trend line backwards and forwards
         extend_minutes = 30
@@ -241,24 +265,25 @@ class GlucoseGrapher:
         ax.plot([start_time, end_time], [start_value, end_value],
                'g--', linewidth=2, alpha=0.6, label='Trend Line')
     
-    def _add_trend_annotations(self, ax, readings: List[GlucoseReading]):
+    def _add_trend_annotations(self, ax, timestamps: np.ndarray, values: np.ndarray):
         """Add trend arrows and annotations"""
-        if len(readings) < 2:
+        if len(values) < 2:
             return
         
-        # Add arrows for significant changes
-        for i in range(1, len(readings)):
-            prev_reading = readings[i-1]
-            curr_reading = readings[i]
-            
-            change = curr_reading.value - prev_reading.value
-            
-            if abs(change) > 20:  # Significant change
-                arrow_color = 'red' if change > 0 else 'blue'
-                ax.annotate('', xy=(curr_reading.timestamp, curr_reading.value),
-                          xytext=(prev_reading.timestamp, prev_reading.value),
-                          arrowprops=dict(arrowstyle='->', color=arrow_color, 
-                                        lw=2, alpha=0.7))
+        # Only significant changes (more than 20 mg/dL) get an arrow
+        changes = np.diff(values)
+        significant = np.flatnonzero(np.abs(changes) > 20)
+        if not len(significant):
+            return
+        
+        times = timestamps.tolist()
+        points = values.tolist()
+        for i, change in zip(significant.tolist(), changes[significant].tolist()):
+            arrow_color = 'red' if change > 0 else 'blue'
+            ax.annotate('', xy=(times[i + 1], points[i + 1]),
+                      xytext=(times[i], points[i]),
+                      arrowprops=dict(arrowstyle='->', color=arrow_color, 
+                                    lw=2, alpha=0.7))
     
     def _customize_plot(self, ax, title: str):
         """Apply standard customization to plot"""
@@ -276,86 +301,71 @@ class GlucoseGrapher:
         # Set y-axis limits
         ax.set_ylim(40, 350)
     
-    def _calculate_rates_of_change(self, readings: List[GlucoseReading]) -> List[float]:
-        """Calculate rates of change between consecutive readings"""
-        rates = []
-        for i in range(1, len(readings)):
-            prev_reading = readings[i-1]
-            curr_reading = readings[i]
-            
-            time_diff = (curr_reading.timestamp - prev_reading.timestamp).total_seconds() / 60.0
-            value_diff = curr_reading.value - prev_reading.value
-            
-            if time_diff > 0:
-                rate = value_diff / time_diff
-                rates.append(rate)
-            else:
-                rates.append(0.0)
+    def _to_arrays(self, readings: List[GlucoseReading]) -> Tuple[np.ndarray, np.ndarray]:
+        """Extract (timestamps as datetime64, values as float64) arrays sorted by time"""
+        timestamps = np.array([r.timestamp for r in readings], dtype='datetime64[us]')
+        values = np.fromiter((r.value for r in readings), dtype=np.float64, count=len(readings))
+        
+        # Database queries return readings newest first; only mixed input needs a sort
+        steps = np.diff(timestamps)
+        if (steps >= np.timedelta64(0)).all():
+            return timestamps, values
+        if (steps < np.timedelta64(0)).all():
+            return timestamps[::-1], values[::-1]
+        
+        order = np.argsort(timestamps, kind='stable')
+        return timestamps[order], values[order]
+    
+    def _calculate_rates_of_change(self, timestamps: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Calculate rates of change (mg/dL/min) between consecutive readings"""
+        time_diffs = np.diff(timestamps) / np.timedelta64(1, 'm')
+        value_diffs = np.diff(values)
+        
+        # Readings sharing a timestamp get a rate of 0 instead of dividing by zero
+        valid = time_diffs > 0
+        rates = np.zeros_like(value_diffs)
+        np.divide(value_diffs, time_diffs, out=rates, where=valid)
         
         return rates
     
     def _group_readings_by_day(self, readings: List[GlucoseReading]) -> Dict:
         """Group readings by day"""
-        daily_data = {}
-        
-        for reading in readings:
-            date_str = reading.timestamp.strftime('%Y-%m-%d')
-            if date_str not in daily_data:
-                daily_data[date_str] = []
-            daily_data[date_str].append(reading)
-        
-        # Sort readings within each day
-        for date_str in daily_data:
-            daily_data[date_str].sort(key=lambda r: r.timestamp)
-        
-        return daily_data
+        # Sort once up front so every day's readings come out already ordered
+        days = defaultdict(list)
+        for reading in sorted(readings, key=lambda r: r.timestamp):
+            days[reading.timestamp.toordinal()].append(reading)
+        
+        # Keys are ordinals until here; days are emitted in date order
+        return {date.fromordinal(day).isoformat(): day_readings
+                for day, day_readings in sorted(days.items())}
     
     def create_statistics_summary(self, readings: List[GlucoseReading]) -> Dict:
         """Create statistical summary of glucose data"""
         if not readings:
             return {}
         
-        values = [r.value for r in readings]
+        timestamps, values = self._to_arrays(readings)
+        count = len(values)
+        
+        # One comparison pass per threshold; in range is whatever is neither
+        low_count = np.count_nonzero(values < self.settings.low_glucose_threshold)
+        high_count = np.count_nonzero(values > self.settings.high_glucose_threshold)
+        in_range = count - low_count - high_count
         
         stats = {
-            'count': len(values),
-            'mean': np.mean(values),
+            'count': count,
+            'mean': values.mean(),
             'median': np.median(values),
-            'std': np.std(values),
-            'min': np.min(values),
-            'max': np.max(values),
+            'std': values.std(),
+            'min': values.min(),
+            'max': values.max(),
             'time_range': {
-                'start': min(r.timestamp for r in readings),
-                'end': max(r.timestamp for r in readings)
+                'start': timestamps[0].item(),
+                'end': timestamps[-1].item()
             },
-            'target_range_percentage': self._calculate_time_in_range(
-                values, self.settings.low_glucose_threshold, 
-                self.settings.high_glucose_threshold
-            ),
-            'low_percentage': self._calculate_time_below_threshold(
-                values, self.settings.low_glucose_threshold
-            ),
-            'high_percentage': self._calculate_time_above_threshold(
-                values, self.settings.high_glucose_threshold
-            )
+            'target_range_percentage': in_range / count * 100,
+            'low_percentage': low_count / count * 100,
+            'high_percentage': high_count / count * 100
         }
         
         return stats
-    
-    def _calculate_time_in_range(self, values: List[float], 
-                               low_threshold: float, high_threshold: float) -> float:
-        """Calculate percentage of time in target range"""
-        in_range = sum(1 for v in values if low_threshold <= v <= high_threshold)
-        return (in_range / len(values)) * 100 if values else 0
-    
-    def _calculate_time_below_threshold(self, values: List[float], 
-                                      threshold: float) -> float:
-        """Calculate percentage of time below threshold"""
-        below = sum(1 for v in values if v < threshold)
-        return (below / len(values)) * 100 if values else 0
-    
-    def _calculate_time_above_threshold(self, values: List[float], 
-                                      threshold: float) -> float:
-        """Calculate percentage of time above threshold"""
-        above = sum(1 for v in values if v > threshold)
-        return (above / len(values)) * 100 if values else 0
\ No newline at end of file
@@ -5,6 +5,9 @@ from src.config import Settings, settings
 from src.database import GlucoseReading
 from src.analysis import TrendAnalyzer, GlucosePredictor
 
+# Fixed reference time so readings are identical from test to test
+_NOW = datetime(2024, 1, 1, 12, 0, 0)
+
 class MockSettings:
     """Mock settings for testing"""
     def __init__(self):
@@ -25,84 +28,96 @@ class MockSettings:
         self.trend_fast_up_threshold = 2.0
         self.trend_very_fast_up_threshold = 4.0
 
+@pytest.fixture(scope="module")
+def mock_settings():
+    """Settings shared by every test in this module (never mutated)"""
+    return MockSettings()
+
+@pytest.fixture(scope="module")
+def analyzer(mock_settings):
+    """Trend analyzer shared by every test in this module (stateless)"""
+    return TrendAnalyzer(mock_settings)
+
+@pytest.fixture(scope="module")
+def predictor(mock_settings):
+    """Predictor shared by every test in this module (stateless)"""
+    return GlucosePredictor(mock_settings)
+
 def create_mock_readings(values, start_time=None, interval_minutes=5):
     """Create mock glucose readings"""
     if start_time is None:
-        start_time = datetime.now()
+        start_time = _NOW
     
-    readings = []
-    for i, value in enumerate(values):
-        timestamp = start_time + timedelta(minutes=i * interval_minutes)
-        reading = GlucoseReading(
-            timestamp=timestamp,
+    # One interval timedelta, scaled per reading
+    step = timedelta(minutes=interval_minutes)
+    readings = [
+        GlucoseReading(
+            timestamp=start_time + i * step,
             value=value,
             trend="no_change"
         )
-        readings.append(reading)
+        for i, value in enumerate(values)
+    ]
     
     return readings
 
+# Reading lists shared by the parametrized trend tests (never mutated)
+READING_FIXTURES = {
+    "stable": create_mock_readings([120, 118, 122, 119, 121]),
+    "rising": create_mock_readings([100, 110, 120, 130, 140]),
+    "falling": create_mock_readings([200, 180, 160, 140, 120]),
+}
+
 class TestTrendAnalyzer:
     
-    def test_stable_glucose_trend(self):
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        
-        # Stable glucose readings
-        readings = create_mock_readings([120, 118, 122, 119, 121])
-        
-        result = analyzer.analyze_trend(readings)
+    @pytest.mark.parametrize("key,expected_trends,expected_direction,rate_range", [
+        ("stable", {'no_change'}, 'stable', (-1.0, 1.0)),
+        ("rising", {'up', 'fast_up', 'very_fast_up'}, 'rising', (1.0, float('inf'))),
+        ("falling", {'down', 'fast_down', 'very_fast_down'}, 'falling', (float('-inf'), -1.0)),
+    ])
+    def test_glucose_trend_direction(self, analyzer, key, expected_trends,
+                                     expected_direction, rate_range):
+        result = analyzer.analyze_trend(READING_FIXTURES[key])
+        
+        low, high = rate_range
+        assert result['trend'] in expected_trends
+        assert low < result['rate_of_change'] < high
+        assert result['direction'] == expected_direction
+        assert result['is_stable'] == (expected_direction == 'stable')
+    
+    def test_stable_glucose_trend_strength(self, analyzer):
+        result = analyzer.analyze_trend(READING_FIXTURES["stable"])
         
-        assert result['trend'] == 'no_change'
-        assert abs(result['rate_of_change']) < 1.0
-        assert result['is_stable'] == True
-        assert result['direction'] == 'stable'
         assert result['trend_strength'] in ['weak', 'moderate']
     
-    def test_rising_glucose_trend(self):
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        
-        # Rising glucose readings
-        readings = create_mock_readings([100, 110, 120, 130, 140])
+    def test_rapid_changes_detection(self, analyzer):
+        # Very rapid rise
+        readings = create_mock_readings([100, 120, 145, 175])  # ~25 mg/dL per 5 min
         
         result = analyzer.analyze_trend(readings)
         
-        assert result['trend'] in ['up', 'fast_up', 'very_fast_up']
-        assert result['rate_of_change'] > 1.0
-        assert result['direction'] == 'rising'
-        assert result['is_stable'] == False
+        assert result['trend'] == 'very_fast_up'
+        assert result['rate_of_change'] >= 5.0
     
-    def test_falling_glucose_trend(self):
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        
-        # Falling glucose readings
-        readings = create_mock_readings([200, 180, 160, 140, 120])
+    def test_slope_and_variance_match_regression(self, analyzer):
+        readings = create_mock_readings([100, 104, 111])
         
         result = analyzer.analyze_trend(readings)
         
-        assert result['trend'] in ['down', 'fast_down', 'very_fast_down']
-        assert result['rate_of_change'] < -1.0
-        assert result['direction'] == 'falling'
-        assert result['is_stable'] == False
+        minutes = np.arange(3) * 5.0
+        values = [r.value for r in readings]
+        assert result['rate_of_change'] == round(np.polyfit(minutes, values, 1)[0], 2)
+        assert result['variance'] == round(np.var(values), 2)
     
-    def test_rapid_changes_detection(self):
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        
-        # Very rapid rise
-        readings = create_mock_readings([100, 120, 145, 175])  # ~25 mg/dL per 5 min
+    def test_identical_timestamps_have_no_rate(self, analyzer):
+        readings = [GlucoseReading(timestamp=_NOW, value=v) for v in (100, 130)]
         
         result = analyzer.analyze_trend(readings)
         
-        assert result['trend'] == 'very_fast_up'
-        assert result['rate_of_change'] >= 5.0
+        assert result['rate_of_change'] == 0.0
+        assert result['variance'] == 225.0
     
-    def test_insufficient_data(self):
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        
+    def test_insufficient_data(self, analyzer):
         # Single reading
         readings = create_mock_readings([120])
         
@@ -112,10 +127,7 @@ class TestTrendAnalyzer:
         assert result['rate_of_change'] == 0.0
         assert result['is_stable'] == True
     
-    def test_pattern_detection_rapid_rise(self):
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        
+    def test_pattern_detection_rapid_rise(self, analyzer):
         # Readings with rapid changes
         readings = create_mock_readings([100, 130, 160, 190])  # 30 mg/dL jumps
         
@@ -126,10 +138,7 @@ class TestTrendAnalyzer:
         assert len(rapid_patterns) > 0
         assert rapid_patterns[0]['severity'] in ['medium', 'high']
     
-    def test_pattern_detection_approaching_threshold(self):
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        
+    def test_pattern_detection_approaching_threshold(self, analyzer):
         # Approaching low threshold
         readings = create_mock_readings([85, 80, 75, 73])
         
@@ -139,10 +148,7 @@ class TestTrendAnalyzer:
                                if p['type'] == 'approaching_low']
         assert len(approaching_patterns) > 0
     
-    def test_pattern_detection_critical_values(self):
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        
+    def test_pattern_detection_critical_values(self, analyzer):
         # Critical low values
         readings = create_mock_readings([60, 55, 50, 45])
         
@@ -153,10 +159,7 @@ class TestTrendAnalyzer:
         assert len(critical_patterns) > 0
         assert critical_patterns[0]['severity'] == 'critical'
     
-    def test_stability_pattern(self):
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        
+    def test_stability_pattern(self, analyzer):
         # Very stable readings
         readings = create_mock_readings([120, 121, 119, 122, 118, 120])
         
@@ -168,10 +171,7 @@ class TestTrendAnalyzer:
 
 class TestGlucosePredictor:
     
-    def test_linear_extrapolation_stable(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_linear_extrapolation_stable(self, predictor):
         # Stable trend
         readings = create_mock_readings([120, 121, 119, 122, 118])
         
@@ -182,12 +182,9 @@ class TestGlucosePredictor:
         assert prediction['method'] in ['linear_extrapolation', 'exponential_smoothing']
         assert prediction['confidence'] in ['low', 'medium', 'high']
     
-    def test_linear_extrapolation_rising(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_linear_extrapolation_rising(self, predictor):
         # Rising trend
-        readings = create_mock_readings([100, 110, 120, 130, 140])
+        readings = READING_FIXTURES["rising"]
         
         prediction = predictor.predict_future_value(readings)
         
@@ -196,12 +193,9 @@ class TestGlucosePredictor:
         assert prediction['predicted_value'] > 140
         assert prediction['confidence'] in ['low', 'medium', 'high']
     
-    def test_linear_extrapolation_falling(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_linear_extrapolation_falling(self, predictor):
         # Falling trend
-        readings = create_mock_readings([200, 180, 160, 140, 120])
+        readings = READING_FIXTURES["falling"]
         
         prediction = predictor.predict_future_value(readings)
         
@@ -210,10 +204,7 @@ class TestGlucosePredictor:
         assert prediction['predicted_value'] < 120
         assert prediction['confidence'] in ['low', 'medium', 'high']
     
-    def test_polynomial_prediction(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_polynomial_prediction(self, predictor):
         # Curved trend (quadratic pattern)
         readings = create_mock_readings([100, 105, 115, 130, 150, 175])
         
@@ -223,10 +214,7 @@ class TestGlucosePredictor:
         # For accelerating rise, should predict high value
         assert prediction['predicted_value'] > 175
     
-    def test_exponential_smoothing(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_exponential_smoothing(self, predictor):
         # Noisy but trending data
         readings = create_mock_readings([120, 115, 125, 118, 128, 122])
         
@@ -235,10 +223,7 @@ class TestGlucosePredictor:
         assert prediction['predicted_value'] is not None
         assert 115 <= prediction['predicted_value'] <= 135
     
-    def test_insufficient_data(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_insufficient_data(self, predictor):
         # Too few readings
         readings = create_mock_readings([120, 125])
         
@@ -248,10 +233,7 @@ class TestGlucosePredictor:
         assert prediction['method'] == 'insufficient_data'
         assert 'warning' in prediction
     
-    def test_prediction_confidence_calculation(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_prediction_confidence_calculation(self, predictor):
         # Very linear, predictable data
         readings = create_mock_readings([100, 105, 110, 115, 120, 125, 130])
         
@@ -261,13 +243,10 @@ class TestGlucosePredictor:
         assert prediction['confidence'] in ['medium', 'high']
         assert 'r_squared' in prediction or 'avg_error' in prediction
     
-    def test_risk_assessment_critical_low(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_risk_assessment_critical_low(self, predictor):
         # Predicting critical low
         current_reading = GlucoseReading(
-            timestamp=datetime.now(),
+            timestamp=_NOW,
             value=65,
             trend="down"
         )
@@ -285,13 +264,10 @@ class TestGlucosePredictor:
         assert 'critical low' in risk['risk_factors'][0].lower()
         assert risk['predicted_change'] < 0
     
-    def test_risk_assessment_critical_high(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_risk_assessment_critical_high(self, predictor):
         # Predicting critical high
         current_reading = GlucoseReading(
-            timestamp=datetime.now(),
+            timestamp=_NOW,
             value=280,
             trend="up"
         )
@@ -307,12 +283,9 @@ class TestGlucosePredictor:
         assert risk['risk_level'] == 'critical'
         assert 'critical high' in risk['risk_factors'][0].lower()
     
-    def test_risk_assessment_low_confidence(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_risk_assessment_low_confidence(self, predictor):
         current_reading = GlucoseReading(
-            timestamp=datetime.now(),
+            timestamp=_NOW,
             value=150,
             trend="no_change"
         )
@@ -330,13 +303,10 @@ class TestGlucosePredictor:
                            if 'confidence' in f.lower()]
         assert len(low_conf_factors) > 0
     
-    def test_time_to_threshold_estimation(self):
-        settings = MockSettings()
-        predictor = GlucosePredictor(settings)
-        
+    def test_time_to_threshold_estimation(self, predictor):
         # Falling towards low threshold
         current_reading = GlucoseReading(
-            timestamp=datetime.now(),
+            timestamp=_NOW,
             value=90,
             trend="down"
         )
@@ -353,19 +323,15 @@ class TestGlucosePredictor:
             # Should estimate time to reach 70 mg/dL threshold
             # (90 - 70) / 2 = 10 minutes
             assert 'low' in risk['time_to_threshold']
-            assert risk['time_to_threshold']['low'] == 10.0
+            assert risk['time_to_threshold']['low'] == pytest.approx(10.0)
 
 class TestIntegrationScenarios:
     """Test realistic scenarios combining trend analysis and prediction"""
     
-    def test_dawn_phenomenon_analysis(self):
+    def test_dawn_phenomenon_analysis(self, analyzer, predictor):
         """Test morning glucose rise (dawn phenomenon)"""
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        predictor = GlucosePredictor(settings)
-        
         # Typical dawn phenomenon: gradual rise
-        morning_time = datetime.now().replace(hour=6, minute=0)
+        morning_time = _NOW.replace(hour=6, minute=0)
         readings = create_mock_readings([120, 135, 150, 165, 180], 
                                        start_time=morning_time, 
                                        interval_minutes=10)
@@ -377,12 +343,8 @@ class TestIntegrationScenarios:
         assert trend_result['direction'] == 'rising'
         assert prediction_result['predicted_value'] > 180
     
-    def test_post_meal_spike_analysis(self):
+    def test_post_meal_spike_analysis(self, analyzer, predictor):
         """Test post-meal glucose spike"""
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        predictor = GlucosePredictor(settings)
-        
         # Post-meal spike pattern
         readings = create_mock_readings([110, 140, 180, 220, 240])
         
@@ -414,12 +376,8 @@ class TestIntegrationScenarios:
         assert trend_result['trend'] == 'down'
         assert prediction_result['predicted_value'] < 70  # Approaching low threshold
 
-    def test_exercise_induced_drop(self):
+    def test_exercise_induced_drop(self, analyzer, predictor):
         """Test exercise-induced glucose drop"""
-        settings = MockSettings()
-        analyzer = TrendAnalyzer(settings)
-        predictor = GlucosePredictor(settings)
-        
         # Exercise drop pattern
         readings = create_mock_readings([150, 130, 110, 90, 75])
         
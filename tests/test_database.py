@@ -1,44 +1,45 @@
 import pytest
-import os
-import tempfile
-import sqlite3
 from datetime import datetime, timedelta
 from src.database import GlucoseDatabase, GlucoseReading
 
 class TestGlucoseDatabase:
     
     def setup_method(self):
-        # Create a temporary database for each test
-        self.temp_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
-        self.temp_db.close()
-        self.db_path = self.temp_db.name
-        self.db = GlucoseDatabase(self.db_path)
-    
-    def teardown_method(self):
-        # Clean up the temporary database
-        if os.path.exists(self.db_path):
-            os.unlink(self.db_path)
+        # Fresh in-memory database for each test, freed with the GlucoseDatabase
+        self.db = GlucoseDatabase(":memory:")
     
     def test_database_initialization(self):
         """Test that database and tables are created properly"""
-        # Check that database file exists
-        assert os.path.exists(self.db_path)
-        
-        # Check that tables exist
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Check glucose_readings table
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='glucose_readings'")
-            assert cursor.fetchone() is not None
-            
-            # Check recommendations table
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='recommendations'")
-            assert cursor.fetchone() is not None
-            
-            # Check index exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='idx_glucose_timestamp'")
-            assert cursor.fetchone() is not None
+        # Check that tables and index exist, in one schema query
+        schema = set(self.db.query("""
+            SELECT type, name FROM sqlite_master
+            WHERE name IN ('glucose_readings', 'recommendations', 'idx_glucose_timestamp')
+        """))
+        
+        assert ('table', 'glucose_readings') in schema
+        assert ('table', 'recommendations') in schema
+        assert ('index', 'idx_glucose_timestamp') in schema
+    
+    def test_in_memory_databases_are_separate(self):
+        """Test that each in-memory database keeps its data across calls but not across instances"""
+        self.db.insert_reading(GlucoseReading(timestamp=datetime.now(), value=120.0))
+        
+        other = GlucoseDatabase(":memory:")
+        
+        assert len(self.db.get_latest_readings(10)) == 1
+        assert other.get_latest_readings(10) == []
+    
+    def test_file_database_keeps_rollback_journal(self, tmp_path):
+        """Test that an on-disk database keeps SQLite's default journal unless WAL is requested"""
+        db = GlucoseDatabase(str(tmp_path / "default.db"))
+        
+        assert db.query("PRAGMA journal_mode") == [("delete",)]
+    
+    def test_file_database_wal_opt_in(self, tmp_path):
+        """Test that wal_mode switches an on-disk database to write-ahead logging"""
+        db = GlucoseDatabase(str(tmp_path / "wal.db"), wal_mode=True)
+        
+        assert db.query("PRAGMA journal_mode") == [("wal",)]
     
     def test_insert_reading(self):
         """Test inserting glucose readings"""
@@ -55,11 +56,12 @@ class TestGlucoseDatabase:
         assert reading_id > 0
         
         # Verify the reading was inserted
-        readings = self.db.get_latest_readings(1)
-        assert len(readings) == 1
-        assert readings[0].value == 120.5
-        assert readings[0].trend == "up"
-        assert readings[0].unit == "mg/dL"
+        stored = self.db.get_reading_by_id(reading_id)
+        assert stored is not None
+        assert stored.timestamp == reading.timestamp
+        assert stored.value == 120.5
+        assert stored.trend == "up"
+        assert stored.unit == "mg/dL"
     
     def test_get_latest_readings(self):
         """Test retrieving latest readings"""
@@ -71,13 +73,10 @@ class TestGlucoseDatabase:
             (base_time, 120.0, "no_change")
         ]
         
-        for timestamp, value, trend in readings_data:
-            reading = GlucoseReading(
-                timestamp=timestamp,
-                value=value,
-                trend=trend
-            )
-            self.db.insert_reading(reading)
+        self.db.insert_readings_bulk([
+            GlucoseReading(timestamp=timestamp, value=value, trend=trend)
+            for timestamp, value, trend in readings_data
+        ])
         
         # Get latest 2 readings
         latest = self.db.get_latest_readings(2)
@@ -87,6 +86,24 @@ class TestGlucoseDatabase:
         assert latest[0].value == 120.0
         assert latest[1].value == 110.0
     
+    def test_insert_readings_bulk_skips_duplicates(self):
+        """Test bulk insert skips readings already stored or repeated in the batch"""
+        base_time = datetime.now()
+        existing = GlucoseReading(timestamp=base_time - timedelta(minutes=5), value=110.0)
+        self.db.insert_reading(existing)
+        
+        inserted = self.db.insert_readings_bulk([
+            existing,
+            GlucoseReading(timestamp=base_time, value=120.0, trend="up"),
+            GlucoseReading(timestamp=base_time, value=120.0, trend="up")
+        ])
+        
+        assert inserted == 1
+        latest = self.db.get_latest_readings(10)
+        assert [r.value for r in latest] == [120.0, 110.0]
+        assert latest[0].trend == "up"
+        assert latest[0].unit == "mg/dL"
+    
     def test_get_readings_since(self):
         """Test retrieving readings since a specific time"""
         base_time = datetime.now()
@@ -98,13 +115,10 @@ class TestGlucoseDatabase:
             (base_time, 120.0, "no_change")                     # After since_time
         ]
         
-        for timestamp, value, trend in readings_data:
-            reading = GlucoseReading(
-                timestamp=timestamp,
-                value=value,
-                trend=trend
-            )
-            self.db.insert_reading(reading)
+        self.db.insert_readings_bulk([
+            GlucoseReading(timestamp=timestamp, value=value, trend=trend)
+            for timestamp, value, trend in readings_data
+        ])
         
         recent_readings = self.db.get_readings_since(since_time)
         
@@ -130,15 +144,13 @@ class TestGlucoseDatabase:
         assert rec_id > 0
         
         # Verify recommendation was inserted
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM recommendations WHERE id = ?", (rec_id,))
-            row = cursor.fetchone()
-            
-            assert row is not None
-            assert row[2] == "insulin"  # recommendation_type
-            assert row[3] == "Consider 2.0 units of rapid-acting insulin"  # message
-            assert row[4] == 200.0  # glucose_value
+        rows = self.db.query("SELECT * FROM recommendations WHERE id = ?", (rec_id,))
+        
+        assert len(rows) == 1
+        row = rows[0]
+        assert row[2] == "insulin"  # recommendation_type
+        assert row[3] == "Consider 2.0 units of rapid-acting insulin"  # message
+        assert row[4] == 200.0  # glucose_value
     
     def test_mark_recommendation_sent(self):
         """Test marking recommendations as sent"""
@@ -231,19 +243,14 @@ class TestGlucoseDatabase:
         self.db.cleanup_old_data(days_to_keep=30)
         
         # Check that old data was removed
-        all_readings = self.db.get_latest_readings(100)
-        reading_ids = [r.id for r in all_readings]
-        assert old_id not in reading_ids
-        assert new_id in reading_ids
+        assert self.db.get_reading_by_id(old_id) is None
+        assert self.db.get_reading_by_id(new_id) is not None
         
         # Check recommendations
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM recommendations")
-            remaining_rec_ids = [row[0] for row in cursor.fetchall()]
-            
-            assert old_rec_id not in remaining_rec_ids  # Should be cleaned up
-            assert new_rec_id in remaining_rec_ids      # Should remain
+        remaining_rec_ids = [row[0] for row in self.db.query("SELECT id FROM recommendations")]
+        
+        assert old_rec_id not in remaining_rec_ids  # Should be cleaned up
+        assert new_rec_id in remaining_rec_ids      # Should remain
     
     def test_reading_with_id_assignment(self):
         """Test that readings get proper ID assignment"""
@@ -260,37 +267,39 @@ class TestGlucoseDatabase:
         reading_id = self.db.insert_reading(reading)
         
         # Retrieve the reading
-        readings = self.db.get_latest_readings(1)
-        retrieved_reading = readings[0]
+        retrieved_reading = self.db.get_reading_by_id(reading_id)
         
         # Should have the assigned ID
         assert retrieved_reading.id == reading_id
         assert retrieved_reading.id is not None
+        assert retrieved_reading.value == 150.0
+        
+        # Unknown ids return nothing
+        assert self.db.get_reading_by_id(reading_id + 1) is None
     
     def test_multiple_database_operations(self):
         """Test multiple operations in sequence"""
         base_time = datetime.now()
         
-        # Insert readings and recommendations in a mixed sequence
-        for i in range(5):
-            timestamp = base_time - timedelta(minutes=i*5)
-            
-            # Insert reading
-            reading = GlucoseReading(
+        rows = [
+            (base_time - timedelta(minutes=i*5), 100 + i*10, "up" if i % 2 == 0 else "down")
+            for i in range(5)
+        ]
+        
+        # Insert all readings in one batch
+        self.db.insert_readings_bulk([
+            GlucoseReading(timestamp=timestamp, value=value, trend=trend)
+            for timestamp, value, trend in rows
+        ])
+        
+        # Insert a recommendation for every other reading
+        for i, (timestamp, value, _) in enumerate(rows[::2]):
+            self.db.insert_recommendation(
                 timestamp=timestamp,
-                value=100 + i*10,
-                trend="up" if i % 2 == 0 else "down"
+                rec_type="monitoring",
+                message=f"Check glucose in {i*10} minutes",
+                glucose_value=value
             )
-            reading_id = self.db.insert_reading(reading)
-            
-            # Insert recommendation every other time
-            if i % 2 == 0:
-                rec_id = self.db.insert_recommendation(
-                    timestamp=timestamp,
-                    rec_type="monitoring",
-                    message=f"Check glucose in {i*5} minutes",
-                    glucose_value=100 + i*10
-                )
         
         # Verify all data is present
         all_readings = self.db.get_latest_readings(10)
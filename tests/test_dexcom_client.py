@@ -0,0 +1,182 @@
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+from src.sensors import DexcomClient
+
+class MockSettings:
+    """Mock settings for testing"""
+    def __init__(self):
+        self.dexcom_username = "test_user"
+        self.dexcom_password = "test_pass"
+        self.dexcom_ous = False
+        self.sensor_reading_interval_seconds = 305
+
+def create_mock_bg(value=120, minutes_ago=1, trend_description="steady"):
+    """Create a mock pydexcom GlucoseReading"""
+    bg = Mock()
+    bg.value = value
+    bg.time = datetime.now() - timedelta(minutes=minutes_ago)
+    bg.trend_description = trend_description
+    return bg
+
+class TestDexcomClient:
+
+    def setup_method(self):
+        self.settings = MockSettings()
+        self.dexcom_patcher = patch('src.sensors.dexcom_client.Dexcom')
+        self.mock_dexcom_cls = self.dexcom_patcher.start()
+        self.mock_dexcom = self.mock_dexcom_cls.return_value
+        self.client = DexcomClient(self.settings)
+
+    def teardown_method(self):
+        self.dexcom_patcher.stop()
+
+    def test_get_current_reading(self):
+        """Test converting a Share reading into a GlucoseReading"""
+        bg = create_mock_bg(value=142, trend_description="rising slightly")
+        self.mock_dexcom.get_current_glucose_reading.return_value = bg
+
+        reading = self.client.get_current_reading()
+
+        assert reading is not None
+        assert reading.value == 142.0
+        assert reading.trend == "up"
+        assert reading.timestamp == bg.time
+        assert self.client.next_expected_reading_time == bg.time + timedelta(seconds=305)
+
+    def test_current_reading_cached_until_next_interval(self):
+        """Test that the Share API is not queried again before a new reading can exist"""
+        self.mock_dexcom.get_current_glucose_reading.return_value = create_mock_bg()
+
+        self.client.get_current_reading()
+        # Second call inside the sensor interval is served from cache (and is a duplicate)
+        assert self.client.get_current_reading() is None
+
+        assert self.mock_dexcom.get_current_glucose_reading.call_count == 1
+
+    def test_cache_expires_after_sensor_interval(self):
+        """Test that an expired cached reading is fetched again"""
+        self.mock_dexcom.get_current_glucose_reading.return_value = create_mock_bg(minutes_ago=10)
+
+        self.client.get_current_reading()
+        self.client.get_current_reading()
+
+        assert self.mock_dexcom.get_current_glucose_reading.call_count == 2
+
+    def test_reconnect_invalidates_cache(self):
+        """Test that reconnecting forces a fresh fetch"""
+        self.mock_dexcom.get_current_glucose_reading.return_value = create_mock_bg()
+
+        self.client.get_current_reading()
+        assert self.client.reconnect() is True
+        self.client.get_current_reading()
+
+        assert self.mock_dexcom.get_current_glucose_reading.call_count == 2
+
+    def test_no_reading_available(self):
+        """Test handling of an empty Share response"""
+        self.mock_dexcom.get_current_glucose_reading.return_value = None
+
+        assert self.client.get_current_reading() is None
+
+    def test_get_recent_readings(self):
+        """Test converting a Share history, skipping readings without a value"""
+        empty = create_mock_bg(minutes_ago=5)
+        empty.value = None
+        self.mock_dexcom.get_glucose_readings.return_value = [
+            create_mock_bg(value=130, minutes_ago=0, trend_description="falling"),
+            empty,
+            create_mock_bg(value=140, minutes_ago=10, trend_description="Rising Slightly"),
+        ]
+
+        readings = self.client.get_recent_readings(hours=1)
+
+        self.mock_dexcom.get_glucose_readings.assert_called_once_with(minutes=60)
+        assert [r.value for r in readings] == [130.0, 140.0]
+        assert [r.trend for r in readings] == ["fast_down", "up"]
+
+    def test_malformed_reading_returns_none(self):
+        """Test that a reading with an unusable value is skipped"""
+        self.mock_dexcom.get_current_glucose_reading.return_value = create_mock_bg(value="n/a")
+
+        assert self.client.get_current_reading() is None
+
+    def test_share_errors_propagate(self):
+        """Test that API failures reach the caller so it can reconnect"""
+        self.mock_dexcom.get_current_glucose_reading.side_effect = ConnectionError("share down")
+
+        with pytest.raises(ConnectionError):
+            self.client.get_current_reading()
+
+    def test_map_trend(self):
+        """Test mapping Share trend descriptions to internal trends"""
+        assert self.client._map_trend("rising quickly") == "very_fast_up"
+        assert self.client._map_trend("Falling Slightly") == "down"
+        assert self.client._map_trend("steady") == "no_change"
+        assert self.client._map_trend("unable to determine trend") == "no_change"
+        assert self.client._map_trend(None) == "no_change"
+        assert self.client._map_trend("") == "no_change"
+
+    def test_next_reading_scheduling(self):
+        """Test availability and wait time follow the sensor timestamp"""
+        assert self.client.is_new_reading_available() is True
+        assert self.client.wait_for_next_reading() == 0.0
+
+        self.mock_dexcom.get_current_glucose_reading.return_value = create_mock_bg(minutes_ago=1)
+        self.client.get_current_reading()
+
+        # Reading is ~60s old, so the next one is due in ~245s
+        assert self.client.is_new_reading_available() is False
+        assert 240 < self.client.wait_for_next_reading() <= 245
+
+        self.client.next_expected_reading_time = datetime.now() - timedelta(seconds=1)
+        assert self.client.is_new_reading_available() is True
+        assert self.client.wait_for_next_reading() == 0.0
+
+    @patch('src.sensors.dexcom_client.time.monotonic')
+    def test_availability_check_reused_within_window(self, mock_monotonic):
+        """Test that polls within a second reuse the last answer until the schedule changes"""
+        mock_monotonic.return_value = 1000.0
+        self.client.next_expected_reading_time = datetime.now() + timedelta(seconds=0.5)
+        assert self.client.is_new_reading_available() is False
+
+        # Deadline passes, but the cached answer is still inside its window
+        mock_monotonic.return_value = 1000.6
+        assert self.client.is_new_reading_available() is False
+
+        mock_monotonic.return_value = 1001.1
+        assert self.client.is_new_reading_available() is True
+
+        # A new schedule discards the cached answer immediately
+        self.client.next_expected_reading_time = datetime.now() + timedelta(seconds=60)
+        assert self.client.is_new_reading_available() is False
+
+    def test_concurrent_callers_share_one_request(self):
+        """Test that overlapping callers wait for a single Share API request"""
+        def slow_fetch():
+            time.sleep(0.1)
+            return create_mock_bg()
+        self.mock_dexcom.get_current_glucose_reading.side_effect = slow_fetch
+
+        threads = [threading.Thread(target=self.client._fetch_current_bg) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert self.mock_dexcom.get_current_glucose_reading.call_count == 1
+
+    def test_connection_test_primes_cache(self):
+        """Test that the startup connection test reading is reused by the first cycle"""
+        self.mock_dexcom.get_current_glucose_reading.return_value = create_mock_bg(value=99)
+
+        assert self.client.test_connection() is True
+        reading = self.client.get_current_reading()
+
+        assert reading.value == 99.0
+        assert self.mock_dexcom.get_current_glucose_reading.call_count == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
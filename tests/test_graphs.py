@@ -0,0 +1,169 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from unittest.mock import Mock
+from datetime import datetime, timedelta
+from src.database import GlucoseReading
+from src.visualization import GlucoseGrapher
+
+class MockSettings:
+    """Mock settings for testing"""
+    def __init__(self):
+        self.low_glucose_threshold = 70
+        self.high_glucose_threshold = 180
+        self.critical_low_threshold = 55
+        self.critical_high_threshold = 300
+        self.prediction_minutes_ahead = 15
+
+def make_readings(values, start=None, step_minutes=5):
+    """Create readings spaced step_minutes apart"""
+    start = start or datetime(2024, 1, 1, 8, 0)
+    return [
+        GlucoseReading(timestamp=start + timedelta(minutes=i * step_minutes), value=v)
+        for i, v in enumerate(values)
+    ]
+
+class TestGlucoseGrapher:
+
+    def setup_method(self):
+        self.settings = MockSettings()
+        self.grapher = GlucoseGrapher(self.settings)
+
+    def teardown_method(self):
+        plt.close('all')
+
+    def test_rates_of_change(self):
+        """Test per-minute rates between consecutive readings"""
+        readings = make_readings([100, 110, 100, 100])
+
+        rates = self.grapher._calculate_rates_of_change(*self.grapher._to_arrays(readings))
+
+        assert rates.tolist() == [2.0, -2.0, 0.0]
+
+    def test_rates_of_change_same_timestamp(self):
+        """Test that readings sharing a timestamp give a zero rate"""
+        readings = make_readings([100, 130], step_minutes=0)
+
+        rates = self.grapher._calculate_rates_of_change(*self.grapher._to_arrays(readings))
+
+        assert rates.tolist() == [0.0]
+
+    def test_to_arrays_sorts_by_timestamp(self):
+        """Test readings are unpacked into time-ordered arrays"""
+        readings = make_readings([100, 110, 120])
+
+        for ordering in (readings, readings[::-1], [readings[1], readings[2], readings[0]]):
+            timestamps, values = self.grapher._to_arrays(ordering)
+
+            assert timestamps.tolist() == [r.timestamp for r in readings]
+            assert values.tolist() == [100.0, 110.0, 120.0]
+
+    def test_trend_and_daily_graphs_saved(self, tmp_path):
+        """Test the trend analysis and daily summary graphs render to files"""
+        readings = make_readings([100, 130, 125, 90, 95])
+        trend_path = str(tmp_path / "trend.png")
+        daily_path = str(tmp_path / "daily.png")
+
+        assert self.grapher.create_trend_analysis_graph(
+            readings, {'rate_of_change': 1.5}, trend_path) == trend_path
+        assert self.grapher.create_daily_summary(readings, daily_path) == daily_path
+
+    def test_trend_annotations_for_significant_changes(self):
+        """Test arrows are drawn only for changes over 20 mg/dL"""
+        ax = Mock()
+        readings = make_readings([100, 125, 130, 105, 85])
+
+        self.grapher._add_trend_annotations(ax, *self.grapher._to_arrays(readings))
+
+        colors = [call.kwargs['arrowprops']['color'] for call in ax.annotate.call_args_list]
+        assert colors == ['red', 'blue']
+        first = ax.annotate.call_args_list[0]
+        assert first.kwargs['xy'] == (readings[1].timestamp, 125.0)
+        assert first.kwargs['xytext'] == (readings[0].timestamp, 100.0)
+
+    def test_target_ranges(self):
+        """Test the five glucose bands and optional legend labels"""
+        ax = Mock()
+
+        self.grapher._add_target_ranges(ax, None, None)
+        self.grapher._add_target_ranges(ax, None, None, with_labels=False)
+
+        calls = ax.axhspan.call_args_list
+        assert [c.args for c in calls[:5]] == [(70, 180), (55, 70), (0, 55), (180, 300), (300, 500)]
+        assert calls[0].kwargs['label'] == 'Target Range'
+        assert {c.kwargs['label'] for c in calls[5:]} == {'_nolegend_'}
+
+    def test_timeline_figure_reused(self, tmp_path):
+        """Test that repeated timelines redraw into the same open figure"""
+        readings = make_readings([100, 150, 120])
+
+        self.grapher.create_glucose_timeline(readings, save_path=str(tmp_path / "a.png"))
+        fig = self.grapher._timeline_fig
+        self.grapher.create_glucose_timeline(readings, save_path=str(tmp_path / "b.png"))
+
+        assert self.grapher._timeline_fig is fig
+        assert len(self.grapher._timeline_ax.lines) == 1
+        assert (tmp_path / "b.png").exists()
+
+    def test_timeline_figure_recreated_after_close(self, tmp_path):
+        """Test that a closed timeline figure is replaced"""
+        readings = make_readings([100, 150, 120])
+
+        self.grapher.create_glucose_timeline(readings, save_path=str(tmp_path / "a.png"))
+        fig = self.grapher._timeline_fig
+        plt.close(fig)
+        self.grapher.create_glucose_timeline(readings, save_path=str(tmp_path / "b.png"))
+
+        assert self.grapher._timeline_fig is not fig
+
+    def test_group_readings_by_day(self):
+        """Test readings are grouped per calendar day in time order"""
+        late = make_readings([150, 160], start=datetime(2024, 1, 2, 23, 50), step_minutes=15)
+        early = make_readings([100, 110], start=datetime(2024, 1, 1, 12, 0))
+
+        daily = self.grapher._group_readings_by_day([late[1], early[1], late[0], early[0]])
+
+        assert list(daily) == ["2024-01-01", "2024-01-02", "2024-01-03"]
+        assert [r.value for r in daily["2024-01-01"]] == [100, 110]
+        assert [r.value for r in daily["2024-01-02"]] == [150]
+        assert [r.value for r in daily["2024-01-03"]] == [160]
+
+    def test_daily_statistics(self):
+        """Test per-day mean, min and max over back-to-back days"""
+        values = np.array([100.0, 140.0, 90.0, 200.0, 160.0, 180.0])
+        starts = np.array([0, 2, 3])
+        counts = np.array([2, 1, 3])
+
+        means, mins, maxs = self.grapher._daily_statistics(values, starts, counts)
+
+        assert means.tolist() == [120.0, 90.0, 180.0]
+        assert mins.tolist() == [100.0, 90.0, 160.0]
+        assert maxs.tolist() == [140.0, 90.0, 200.0]
+
+    def test_statistics_summary(self):
+        """Test summary statistics and time in/below/above range"""
+        readings = make_readings([60, 70, 120, 180, 200])
+
+        stats = self.grapher.create_statistics_summary(readings)
+
+        assert stats['count'] == 5
+        assert stats['mean'] == pytest.approx(126.0)
+        assert stats['median'] == 120.0
+        assert stats['min'] == 60.0
+        assert stats['max'] == 200.0
+        # Thresholds themselves count as in range
+        assert stats['target_range_percentage'] == pytest.approx(60.0)
+        assert stats['low_percentage'] == pytest.approx(20.0)
+        assert stats['high_percentage'] == pytest.approx(20.0)
+        assert stats['time_range']['start'] == readings[0].timestamp
+        assert stats['time_range']['end'] == readings[-1].timestamp
+
+    def test_statistics_summary_empty(self):
+        """Test that no readings give an empty summary"""
+        assert self.grapher.create_statistics_summary([]) == {}
+
+if __name__ == "__main__":
+    pytest.main([__file__])
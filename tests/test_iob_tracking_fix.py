@@ -1,6 +1,4 @@
 import pytest
-import os
-import tempfile
 from datetime import datetime, timedelta
 from src.database import GlucoseDatabase, InsulinEntry, CarbEntry
 
@@ -9,16 +7,8 @@ class TestIOBTrackingFix:
     """Test cases for the IOB tracking datetime comparison fix"""
     
     def setup_method(self):
-        # Create a temporary database for each test
-        self.temp_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
-        self.temp_db.close()
-        self.db_path = self.temp_db.name
-        self.db = GlucoseDatabase(self.db_path)
-    
-    def teardown_method(self):
-        # Clean up the temporary database
-        if os.path.exists(self.db_path):
-            os.unlink(self.db_path)
+        # Fresh in-memory database for each test, freed with the GlucoseDatabase
+        self.db = GlucoseDatabase(":memory:")
     
     def test_active_insulin_datetime_comparison_fix(self):
         """Test that active insulin is found correctly with datetime comparison fix"""
@@ -1,7 +1,10 @@
+import numpy as np
 import pytest
+from unittest.mock import Mock, patch
 from datetime import datetime, timedelta
 from src.config import Settings
 from src.sensors import MockDexcomClient
+from src.sensors.mock_client import _scenarios_for_hour
 
 class MockSettings:
     """Mock settings for testing"""
@@ -131,6 +134,65 @@ class TestMockDexcomClient:
             assert reading.unit == "mg/dL"
             assert reading.trend is not None
     
+    def test_recent_readings_types(self):
+        """Test that vectorized history yields plain Python values"""
+        recent_readings = self.client.get_recent_readings(hours=2)
+        
+        assert len(recent_readings) == 24
+        for reading in recent_readings:
+            assert type(reading.value) is float
+            assert type(reading.trend) is str
+    
+    def test_recent_readings_arrays(self):
+        """Test the array form of the mock history"""
+        timestamps, values, trend_indexes = self.client.get_recent_readings_arrays(hours=1)
+        
+        assert len(timestamps) == len(values) == len(trend_indexes) == 12
+        assert (np.diff(timestamps) == np.timedelta64(5, 'm')).all()
+        assert ((values >= 50) & (values <= 300)).all()
+        assert trend_indexes.max() < len(MockDexcomClient.TREND_VOCAB)
+    
+    def test_history_variation_table_matches_formula(self):
+        """Test that the precomputed variation equals the direct sine formula"""
+        # Noise-free generator so only the variation term remains
+        self.client._rng = Mock()
+        self.client._rng.normal.side_effect = lambda mean, sigma, n: np.zeros(n)
+        self.client._rng.integers.side_effect = lambda low, high, n, dtype: np.zeros(n, dtype=dtype)
+        
+        for hours in (1, 24, 25):
+            _, values, _ = self.client.get_recent_readings_arrays(hours)
+            minutes_ago = np.arange(hours * 12 - 1, -1, -1) * 5
+            expected = np.clip(np.round(120 + 20 * (1 + 0.5 * np.sin(minutes_ago / 60.0)), 1), 50, 300)
+            assert np.array_equal(values, expected)
+    
+    def test_gauss_buffer_refills_in_batches(self):
+        """Test that live-reading noise is drawn from a pre-generated buffer"""
+        assert len(self.client._gauss_buf) == 0
+        self.client._next_gauss()
+        remaining = len(self.client._gauss_buf)
+        assert remaining > 0
+        
+        self.client._next_gauss()
+        assert len(self.client._gauss_buf) == remaining - 1
+    
+    def test_trend_drift_follows_direction(self):
+        """Test that live values drift in the direction of the current trend"""
+        for trend, low, high in [("very_fast_up", 8, 15), ("down", -4, -1)]:
+            self.client.trend_direction = trend
+            self.client.current_value = 200.0
+            self.client._gauss_buf.extend([0.0])  # no noise for this draw
+            value = self.client._generate_realistic_value()
+            assert 200.0 + low <= value <= 200.0 + high
+    
+    def test_realistic_value_rounding_and_bounds(self):
+        """Test that live values are rounded to one decimal and clamped"""
+        self.client.trend_direction = "no_change"
+        for current, noise, expected in [(120.0, 0.06, 120.1), (120.0, -0.06, 119.9),
+                                         (39.0, -1.0, 40.0), (399.0, 1.0, 400.0)]:
+            self.client.current_value = current
+            self.client._gauss_buf.extend([noise / 5])
+            assert self.client._generate_realistic_value() == expected
+    
     def test_connection_methods(self):
         """Test connection-related methods"""
         # These should always succeed for mock client
@@ -177,6 +239,18 @@ class TestMockDexcomClient:
             
             prev_reading = current_reading
     
+    def test_determine_trend_thresholds(self):
+        """Test trend classification at and around each threshold"""
+        expected = {
+            -12: "very_fast_down", -10: "fast_down", -6: "fast_down", -5: "down",
+            -3: "down", -2: "no_change", 0: "no_change", 2: "no_change",
+            3: "up", 5: "up", 6: "fast_up", 10: "fast_up", 12: "very_fast_up"
+        }
+        for diff, trend in expected.items():
+            self.client.current_value = 100.0
+            assert self.client._determine_trend(100.0 + diff) == trend
+            assert self.client.trend_direction == trend
+    
     def test_unknown_scenario(self):
         """Test handling of unknown scenarios"""
         # Should handle unknown scenario gracefully
@@ -206,6 +280,54 @@ class TestMockDexcomClient:
                 assert value > 0
                 assert isinstance(trend, str)
     
+    def test_scenarios_shared_between_instances(self):
+        """Test that scenario data is generated once and reused"""
+        other = MockDexcomClient(self.settings)
+
+        assert other.scenario_readings is self.client.scenario_readings
+        
+        # Switching scenarios on one instance does not affect another
+        other.set_scenario("rapid_fall")
+        other.get_current_reading()
+        assert self.client.current_scenario == "normal"
+        assert self.client.reading_count == 0
+    
+    def test_scenarios_follow_the_current_hour(self):
+        """Test that a new hour shifts scenario timestamps but keeps the seeded values"""
+        hour = datetime(2024, 1, 1, 12)
+        earlier = _scenarios_for_hour(hour)
+        later = _scenarios_for_hour(hour + timedelta(hours=1))
+        
+        assert earlier["normal"][0][0] == hour - timedelta(hours=2)
+        assert later["normal"][0][0] == hour - timedelta(hours=1)
+        assert [v for _, v, _ in earlier["normal"]] == [v for _, v, _ in later["normal"]]
+    
+    @patch('src.sensors.mock_client.time.monotonic')
+    def test_scheduling_uses_monotonic_clock(self, mock_monotonic):
+        """Test that wait time counts down on the monotonic clock"""
+        mock_monotonic.return_value = 500.0
+        self.client.next_expected_reading_time = datetime.now() + timedelta(seconds=100)
+        assert 99 < self.client.wait_for_next_reading() <= 100
+        
+        mock_monotonic.return_value = 560.0
+        assert 39 < self.client.wait_for_next_reading() <= 40
+        assert self.client.is_new_reading_available() == False
+        
+        mock_monotonic.return_value = 601.0
+        assert self.client.wait_for_next_reading() == 0.0
+        assert self.client.is_new_reading_available() == True
+    
+    def test_duplicate_reading_retries_after_20_seconds(self):
+        """Test that re-serving the last reading schedules a short retry"""
+        reading = self.client.get_current_reading()
+        self.client.reading_count -= 1  # serve the same scenario entry again
+        
+        before = datetime.now()
+        assert self.client.get_current_reading() is None
+        retry_at = self.client.next_expected_reading_time
+        assert before + timedelta(seconds=20) <= retry_at <= datetime.now() + timedelta(seconds=20)
+        assert self.client.last_reading_time == reading.timestamp
+    
     def test_reading_count_progression(self):
         """Test that reading count progresses correctly"""
         initial_count = self.client.reading_count
@@ -3,7 +3,6 @@ Test to demonstrate how recommendations change after entering IOB.
 Only mocks Telegram - uses real database, settings, and analysis components.
 """
 import pytest
-import tempfile
 import os
 from datetime import datetime, timedelta
 
@@ -17,14 +16,6 @@ from src.analysis.recommendations import RecommendationEngine
 class TestRecommendationChangeAfterIOB:
     """Test that demonstrates recommendation changes after IOB entry"""
 
-    @pytest.fixture
-    def temp_db(self):
-        """Create temporary database for testing"""
-        temp_fd, temp_path = tempfile.mkstemp(suffix='.db')
-        os.close(temp_fd)
-        yield temp_path
-        os.unlink(temp_path)
-
     @pytest.fixture
     def settings(self):
         """Create test settings"""
@@ -68,10 +59,10 @@ class TestRecommendationChangeAfterIOB:
         for var, value in original_env.items():
             os.environ[var] = value
 
-    def test_recommendation_changes_after_iob_entry(self, temp_db, settings):
+    def test_recommendation_changes_after_iob_entry(self, settings):
         """Test that insulin recommendations change after entering IOB"""
         # Initialize database and command processor
-        db = GlucoseDatabase(temp_db)
+        db = GlucoseDatabase(":memory:")
         command_processor = CommandProcessor(db, settings)
 
         # Initialize analysis components
@@ -36,15 +36,16 @@ def create_mock_readings(values, start_time=None, interval_minutes=5):
     if start_time is None:
         start_time = datetime.now()
     
-    readings = []
-    for i, value in enumerate(values):
-        timestamp = start_time + timedelta(minutes=i * interval_minutes)
-        reading = GlucoseReading(
-            timestamp=timestamp,
+    # One interval timedelta, scaled per reading
+    step = timedelta(minutes=interval_minutes)
+    readings = [
+        GlucoseReading(
+            timestamp=start_time + i * step,
             value=value,
             trend="no_change"
         )
-        readings.append(reading)
+        for i, value in enumerate(values)
+    ]
     
     # Sort readings by timestamp, most recent first (as expected by recommendation system)
     readings.sort(key=lambda r: r.timestamp, reverse=True)
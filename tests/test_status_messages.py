@@ -1,9 +1,11 @@
 import pytest
 import os
+import json
+import time
 import tempfile
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch, MagicMock
-from src.notifications.telegram_bot import TelegramNotifier
+from src.notifications.telegram_bot import TelegramNotifier, TelegramCommandBridge
 from src.config.settings import Settings
 
 
@@ -34,8 +36,8 @@ class TestStatusMessages:
         # Create settings instance (will read from environment)
         self.settings = Settings()
         
-        # Mock the requests.post method to avoid actual API calls
-        self.mock_requests_patcher = patch('src.notifications.telegram_bot.requests.post')
+        # Mock the session post method to avoid actual API calls
+        self.mock_requests_patcher = patch('src.notifications.telegram_bot.requests.Session.post')
         self.mock_requests = self.mock_requests_patcher.start()
         
         # Configure the mock to return a successful response
@@ -104,7 +106,7 @@ TELEGRAM_STATUS_END_HOUR=22
             settings_disabled = Settings(temp_env_disabled.name)
             
             # Use the same mocked requests from setup_method
-            with patch('src.notifications.telegram_bot.requests.post', self.mock_requests):
+            with patch('src.notifications.telegram_bot.requests.Session.post', self.mock_requests):
                 telegram_disabled = TelegramNotifier(settings_disabled)
                 assert telegram_disabled.should_send_status_message() is False
                 
@@ -166,7 +168,7 @@ TELEGRAM_STATUS_END_HOUR=7
             settings_midnight = Settings(temp_env_midnight.name)
             
             # Use the same mocked requests from setup_method
-            with patch('src.notifications.telegram_bot.requests.post', self.mock_requests):
+            with patch('src.notifications.telegram_bot.requests.Session.post', self.mock_requests):
                 telegram_midnight = TelegramNotifier(settings_midnight)
                 
                 mock_now = Mock()
@@ -197,37 +199,50 @@ TELEGRAM_STATUS_END_HOUR=7
         finally:
             os.unlink(temp_env_midnight.name)
     
+    @patch('src.notifications.telegram_bot.time.monotonic')
     @patch('src.notifications.telegram_bot.datetime')
-    def test_should_send_status_message_timing(self, mock_datetime):
+    def test_should_send_status_message_timing(self, mock_datetime, mock_monotonic):
         """Test timing logic for sending status messages"""
-        base_time = datetime(2023, 8, 25, 12, 0, 0)
+        base_mono = 100000.0
         
         # Mock current time to be within status hours
         mock_now = Mock()
         mock_now.hour = 12
         mock_datetime.now.return_value = mock_now
+        mock_monotonic.return_value = base_mono
         
         # Reset state to ensure clean test
         self.telegram_notifier.last_message_time = None
+        self.telegram_notifier._last_message_mono = None
         
         # Test: no previous message - should send
         assert self.telegram_notifier.should_send_status_message() is True
         
         # Test: previous message 10 minutes ago - should not send (interval is 30 min)
-        self.telegram_notifier.last_message_time = base_time - timedelta(minutes=10)
-        mock_datetime.now.return_value = base_time
+        self.telegram_notifier._last_message_mono = base_mono - 10 * 60
         assert self.telegram_notifier.should_send_status_message() is False
         
         # Test: previous message 35 minutes ago - should send
-        self.telegram_notifier.last_message_time = base_time - timedelta(minutes=35)
-        mock_datetime.now.return_value = base_time
+        self.telegram_notifier._last_message_mono = base_mono - 35 * 60
         assert self.telegram_notifier.should_send_status_message() is True
         
         # Test: previous message exactly 30 minutes ago - should send
-        self.telegram_notifier.last_message_time = base_time - timedelta(minutes=30)
-        mock_datetime.now.return_value = base_time
+        self.telegram_notifier._last_message_mono = base_mono - 30 * 60
         assert self.telegram_notifier.should_send_status_message() is True
     
+    def test_status_schedule_ignores_wall_clock_jumps(self):
+        """Test that a wall-clock change does not affect the status interval"""
+        with patch('src.notifications.telegram_bot.datetime') as mock_datetime:
+            mock_now = Mock()
+            mock_now.hour = 12
+            mock_datetime.now.return_value = mock_now
+            
+            # Message just sent, but the wall clock claims it was hours ago
+            self.telegram_notifier._last_message_mono = time.monotonic()
+            self.telegram_notifier.last_message_time = datetime.now() - timedelta(hours=5)
+            
+            assert self.telegram_notifier.should_send_status_message() is False
+    
     @patch('src.notifications.telegram_bot.datetime')
     def test_should_send_status_message_outside_hours(self, mock_datetime):
         """Test that status messages are not sent outside configured hours"""
@@ -257,12 +272,12 @@ TELEGRAM_STATUS_END_HOUR=7
         
         assert success is True
         
-        # Verify that requests.post was called
+        # Verify that the session post was called
         assert self.mock_requests.called
         
         # Get the call arguments
         call_args = self.mock_requests.call_args
-        payload = call_args[1]['json']
+        payload = json.loads(call_args[1]['data'])
         
         # Check message structure
         assert payload['chat_id'] == '123456789'
@@ -288,7 +303,7 @@ TELEGRAM_STATUS_END_HOUR=7
         
         # Get the message content
         call_args = self.mock_requests.call_args
-        payload = call_args[1]['json']
+        payload = json.loads(call_args[1]['data'])
         message = payload['text']
         
         assert 'Status Update' in message
@@ -367,4 +382,195 @@ TELEGRAM_CHAT_ID=
         assert success is False
         
         # Last message time should not be updated on failure
-        assert self.telegram_notifier.last_message_time is None
\ No newline at end of file
+        assert self.telegram_notifier.last_message_time is None
+    
+    def test_is_iob_number_parsing(self):
+        """Test IOB shortcut detection for plain numbers and chat text"""
+        assert self.telegram_notifier._is_iob_number("2.5") == 2.5
+        assert self.telegram_notifier._is_iob_number(" 1,2 ") == 1.2
+        assert self.telegram_notifier._is_iob_number(".5") == 0.5
+        assert self.telegram_notifier._is_iob_number("3") == 3.0
+        assert self.telegram_notifier._is_iob_number("0") == 0.0
+        assert self.telegram_notifier._is_iob_number("20") == 20.0
+        
+        # Non-numeric text and out-of-range values are not IOB shortcuts
+        assert self.telegram_notifier._is_iob_number("hello") is None
+        assert self.telegram_notifier._is_iob_number("") is None
+        assert self.telegram_notifier._is_iob_number("2.5u") is None
+        assert self.telegram_notifier._is_iob_number("25") is None
+    
+    def test_duplicate_alerts_are_suppressed(self):
+        """Test that identical alerts within the dedup window are sent once"""
+        assert self.telegram_notifier.send_alert("low", "Glucose low", 65.0, urgency='high') is True
+        assert self.telegram_notifier.send_alert("low", "Glucose low", 65.2, urgency='high') is True
+        assert self.mock_requests.call_count == 1
+        
+        # A different value or urgency is a new alert
+        assert self.telegram_notifier.send_alert("low", "Glucose low", 60.0, urgency='high') is True
+        assert self.telegram_notifier.send_alert("low", "Glucose low", 60.0, urgency='critical') is True
+        assert self.mock_requests.call_count == 3
+    
+    def test_duplicate_alert_resent_after_window(self):
+        """Test that an alert is sent again once the dedup window has passed"""
+        self.telegram_notifier.send_alert("low", "Glucose low", 65.0, urgency='high')
+        
+        # Age the recorded send beyond the 120 second default window
+        for key in self.telegram_notifier._recent_alerts:
+            self.telegram_notifier._recent_alerts[key] -= 121
+        
+        self.telegram_notifier.send_alert("low", "Glucose low", 65.0, urgency='high')
+        assert self.mock_requests.call_count == 2
+    
+    def test_api_calls_share_keep_alive_session(self):
+        """Test that Telegram calls go through one pooled session"""
+        adapter = self.telegram_notifier._session.get_adapter('https://api.telegram.org')
+        assert adapter._pool_maxsize == 8
+        assert adapter.max_retries.total == 3
+        
+        self.telegram_notifier._send_message("first")
+        self.telegram_notifier._send_message("second")
+        assert self.mock_requests.call_count == 2
+    
+    def test_webhook_server_dispatches_updates(self):
+        """Test that webhook updates with a valid secret reach _process_update"""
+        import requests as real_requests
+        
+        with patch.object(self.telegram_notifier, 'set_webhook', return_value=True), \
+             patch.object(self.telegram_notifier, '_process_update') as mock_process:
+            assert self.telegram_notifier.start_webhook_server(
+                'https://example.com/tg', secret_token='s3cret', port=0) is True
+            try:
+                host, port = self.telegram_notifier.webhook_server.server_address
+                assert host == '127.0.0.1'
+                url = f"http://127.0.0.1:{port}/tg"
+                update = {'update_id': 1, 'message': {'text': '/status'}}
+                
+                unsigned = real_requests.Session().request('POST', url, json=update, timeout=5)
+                assert unsigned.status_code == 403
+                
+                rejected = real_requests.Session().request(
+                    'POST', url, json=update, timeout=5,
+                    headers={'X-Telegram-Bot-Api-Secret-Token': 'wrong'})
+                assert rejected.status_code == 403
+                
+                accepted = real_requests.Session().request(
+                    'POST', url, json=update, timeout=5,
+                    headers={'X-Telegram-Bot-Api-Secret-Token': 's3cret'})
+                assert accepted.status_code == 200
+                
+                # The update is processed after the request is acknowledged
+                deadline = time.monotonic() + 5
+                while not mock_process.called and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                self.telegram_notifier.stop_webhook_server()
+            
+            mock_process.assert_called_once_with(update)
+            assert self.telegram_notifier.webhook_server is None
+    
+    def test_webhook_server_requires_secret(self):
+        """Test that the webhook server is not started without a secret token"""
+        with patch.object(self.telegram_notifier, 'set_webhook') as mock_set_webhook:
+            assert self.telegram_notifier.start_webhook_server(
+                'https://example.com/tg', secret_token=None, port=0) is False
+        
+        mock_set_webhook.assert_not_called()
+        assert self.telegram_notifier.webhook_server is None
+    
+    def test_commands_run_on_worker_threads(self):
+        """Test that queued commands execute off the ingress thread"""
+        import threading
+        
+        handled_on = []
+        self.telegram_notifier.register_command_handler(
+            'ping', lambda args, message: handled_on.append(threading.current_thread().name) or 'pong')
+        
+        self.telegram_notifier._start_command_workers()
+        try:
+            update = {'update_id': 1, 'message': {'chat': {'id': 123456789}, 'text': '/ping'}}
+            self.telegram_notifier._process_update(update)
+            for command_queue in self.telegram_notifier._command_queues:
+                command_queue.join()
+        finally:
+            self.telegram_notifier._stop_command_workers()
+        
+        assert len(handled_on) == 1
+        assert handled_on[0].startswith('telegram-command-')
+        payload = json.loads(self.mock_requests.call_args[1]['data'])
+        assert payload['text'] == 'pong'
+    
+    def test_commands_from_one_chat_run_in_order(self):
+        """Test that a chat's commands run in the order they were sent across workers"""
+        handled = []
+        
+        def handle_insulin(args, message):
+            # Slow enough for /status to overtake it on a second worker
+            time.sleep(0.05)
+            handled.append('insulin')
+            return 'logged'
+        
+        self.telegram_notifier.register_command_handler('insulin', handle_insulin)
+        self.telegram_notifier.register_command_handler(
+            'status', lambda args, message: handled.append('status') or 'status')
+        
+        with patch.dict(os.environ, {'TELEGRAM_WORKERS': '4'}):
+            self.telegram_notifier._start_command_workers()
+        try:
+            assert len(self.telegram_notifier._command_workers) == 4
+            for update_id, text in ((1, '/insulin 2'), (2, '/status')):
+                self.telegram_notifier._process_update(
+                    {'update_id': update_id, 'message': {'chat': {'id': 123456789}, 'text': text}})
+            for command_queue in self.telegram_notifier._command_queues:
+                command_queue.join()
+        finally:
+            self.telegram_notifier._stop_command_workers()
+        
+        assert handled == ['insulin', 'status']
+    
+    @patch('src.notifications.telegram_bot.time.sleep')
+    def test_send_retries_after_rate_limit(self, mock_sleep):
+        """Test that a 429 response is retried after the advertised delay"""
+        limited = Mock()
+        limited.status_code = 429
+        limited.content = b'{"ok": false, "parameters": {"retry_after": 3}}'
+        ok = Mock()
+        ok.status_code = 200
+        self.mock_requests.side_effect = [limited, ok]
+        
+        assert self.telegram_notifier._send_message("hello") is True
+        assert self.mock_requests.call_count == 2
+        mock_sleep.assert_any_call(3.0)
+    
+    @patch('src.notifications.telegram_bot.time.sleep')
+    def test_send_throttles_bursts_per_chat(self, mock_sleep):
+        """Test that sends beyond the per-chat burst are delayed"""
+        for i in range(3):
+            self.telegram_notifier._send_message(f"message {i}")
+        mock_sleep.assert_not_called()
+        
+        self.telegram_notifier._send_message("message 3")
+        assert mock_sleep.call_count == 1
+        assert 0 < mock_sleep.call_args[0][0] <= 1.0
+
+    def test_bridge_amount_commands_share_argument_parsing(self):
+        """Test /carbs, /insulin and /iob parse <amount> [kind] [notes] the same way"""
+        self.telegram_notifier.enabled = False  # no polling/webhook for this test
+        bridge = TelegramCommandBridge(self.telegram_notifier, Mock(spec=[]), Mock(), self.settings)
+        bridge.command_processor = Mock()
+        bridge.formatter = Mock()
+        bridge.formatter.format_carbs_result.return_value = 'logged'
+        
+        assert bridge._handle_carbs(['30', 'fast', 'orange', 'juice'], {}) == 'logged'
+        bridge.command_processor.execute_carbs.assert_called_once_with(30.0, 'fast', 'orange juice')
+        
+        bridge._handle_insulin(['2.5'], {})
+        bridge.command_processor.execute_insulin.assert_called_once_with(2.5, 'rapid', None)
+        
+        bridge._handle_iob(['0.2', 'omnipod'], {})
+        bridge.command_processor.execute_iob_override.assert_called_once_with(0.2, 'omnipod', None)
+        
+        assert bridge._handle_carbs([], {}).startswith("Log carbohydrate intake")
+        assert bridge._handle_insulin(['lots'], {}).startswith("Invalid format. Usage: /insulin")
+        
+        bridge.command_processor.execute_iob_override.side_effect = RuntimeError("db locked")
+        assert bridge._handle_iob(['1'], {}) == "Error setting IOB override: db locked"
@@ -0,0 +1,156 @@
+import io
+import os
+import signal
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from src.terminal.user_input import UserInputHandler
+
+class TestUserInputHandler:
+
+    def setup_method(self):
+        self.handler = UserInputHandler(Mock(), SimpleNamespace(prediction_minutes_ahead=15))
+        self.handler.command_processor = Mock()
+        self.handler.formatter = Mock()
+
+    def test_process_command_dispatches_with_args(self):
+        """Test that a known command receives the remaining tokens"""
+        self.handler._process_command("C 30 fast orange juice")
+
+        self.handler.command_processor.execute_carbs.assert_called_once_with(
+            30.0, 'fast', 'orange juice')
+
+    def test_process_command_tolerates_irregular_whitespace(self):
+        """Test that tabs and repeated spaces separate arguments like single spaces"""
+        self.handler._process_command("  i\t2.5   rapid  ")
+
+        self.handler.command_processor.execute_insulin.assert_called_once_with(
+            2.5, 'rapid', None)
+
+    def test_notes_keep_their_original_text(self):
+        """Test that free-text notes are passed through unsplit"""
+        self.handler._process_command("iob 0.4 omnipod after  lunch, pod 2")
+
+        self.handler.command_processor.execute_iob_override.assert_called_once_with(
+            0.4, 'omnipod', 'after  lunch, pod 2')
+
+    def test_amount_commands_use_default_kind(self):
+        """Test that a bare amount gets each command's default type and no notes"""
+        self.handler._process_command("c 45")
+        self.handler._process_command("iob 0.2")
+
+        self.handler.command_processor.execute_carbs.assert_called_once_with(45.0, 'mixed', None)
+        self.handler.command_processor.execute_iob_override.assert_called_once_with(
+            0.2, 'manual', None)
+
+    def test_invalid_amount_is_reported(self, capsys):
+        """Test that a non-numeric amount prints the handler's hint"""
+        self.handler._process_command("i two")
+
+        assert "Invalid units" in capsys.readouterr().out
+        self.handler.command_processor.execute_insulin.assert_not_called()
+
+    def test_process_command_without_args(self):
+        """Test that bare commands get an empty argument list"""
+        self.handler._process_command("history")
+
+        self.handler.command_processor.execute_history.assert_called_once_with(6)
+
+    def test_command_table_resolves_to_handlers(self):
+        """Test that every command word names an existing handler method"""
+        for command, handler_name in UserInputHandler._COMMAND_NAMES.items():
+            assert callable(getattr(self.handler, handler_name)), command
+
+    def test_process_unknown_command(self, capsys):
+        """Test that unknown commands print a hint and run nothing"""
+        self.handler._process_command("bolus 2")
+
+        assert "Unknown command: bolus" in capsys.readouterr().out
+        assert not self.handler.command_processor.method_calls
+
+    def test_process_blank_command(self):
+        """Test that whitespace-only input is ignored"""
+        self.handler._process_command("   ")
+
+        assert not self.handler.command_processor.method_calls
+
+    def test_handler_errors_are_reported(self, capsys):
+        """Test that a failing handler does not escape _process_command"""
+        self.handler.formatter.format_status_result.side_effect = RuntimeError("boom")
+
+        self.handler._process_command("s")
+
+        assert "Error getting status: boom" in capsys.readouterr().out
+
+    def test_quit_uses_registered_callback(self):
+        """Test that quit notifies the application instead of signalling"""
+        quit_requested = Mock()
+        self.handler.callbacks['quit_requested'] = quit_requested
+
+        with patch('src.terminal.user_input.os.kill') as mock_kill:
+            self.handler._process_command("q")
+
+        quit_requested.assert_called_once_with()
+        mock_kill.assert_not_called()
+        assert self.handler.running is False
+
+    def test_quit_without_callback_sends_sigint(self):
+        """Test the SIGINT fallback when no quit callback is registered"""
+        with patch('src.terminal.user_input.os.kill') as mock_kill:
+            self.handler._process_command("quit")
+
+        mock_kill.assert_called_once_with(os.getpid(), signal.SIGINT)
+
+    def test_input_loop_reads_lines_until_eof(self, capsys):
+        """Test the blocking input loop processes each line and stops at EOF"""
+        self.handler.running = True
+
+        with patch('src.terminal.user_input.HAS_SELECT', False), \
+             patch('src.terminal.user_input.sys.stdin', io.StringIO("s\n\nh\n")):
+            self.handler._input_loop()
+
+        self.handler.command_processor.execute_status.assert_called_once_with()
+        self.handler.formatter.format_help.assert_called_once_with()
+        assert "Enter command (h for help): " in capsys.readouterr().out
+
+    def test_input_loop_falls_back_without_stdin_descriptor(self):
+        """Test that a stdin stream without a file descriptor is read by blocking"""
+        self.handler.running = True
+
+        with patch('src.terminal.user_input.sys.stdin', io.StringIO("s\n")):
+            self.handler._input_loop()
+
+        self.handler.command_processor.execute_status.assert_called_once_with()
+
+    def test_input_loop_reads_from_selector(self):
+        """Test that commands arriving on a real descriptor are dispatched"""
+        self.handler.running = True
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b"s\n")
+        os.close(write_fd)
+
+        with os.fdopen(read_fd) as pipe_stdin, \
+             patch('src.terminal.user_input.sys.stdin', pipe_stdin):
+            self.handler._input_loop()
+
+        self.handler.command_processor.execute_status.assert_called_once_with()
+
+    def test_stop_wakes_idle_input_loop(self):
+        """Test that stop() ends a loop waiting on input without a polling delay"""
+        idle_r, idle_w = os.pipe()
+        with os.fdopen(idle_r) as idle_stdin, \
+             patch('src.terminal.user_input.sys.stdin', idle_stdin):
+            self.handler.start()
+            time.sleep(0.05)
+
+            started = time.monotonic()
+            self.handler.stop()
+
+            assert time.monotonic() - started < 0.5
+            assert not self.handler.input_thread.is_alive()
+        os.close(idle_w)
+        assert self.handler._wakeup_r is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])